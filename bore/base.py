@@ -1,10 +1,79 @@
+import weakref
+import numpy as np
 import tensorflow as tf
 
+from scipy.special import expit, ndtr, ndtri
 from scipy.stats import truncnorm
-from .decorators import unbatch, value_and_gradient, numpy_io, squeeze
+from sklearn.utils import check_random_state
+from tensorflow.keras.layers import Dense, RepeatVector, RNN, LSTMCell
+from .decorators import (unbatch, value_and_gradient,
+                         transformed_value_and_gradient, numpy_io, squeeze)
 
+try:
+    from numba.typed import List
+    from .jit import (ACTIVATIONS as JIT_ACTIVATIONS, dense_value_and_gradient,
+                      recurrent_value_and_gradient)
+except ImportError:  # numba is an optional dependency
+    dense_value_and_gradient = recurrent_value_and_gradient = None
 
-def convert(model, transform=tf.identity):
+
+# NumPy implementations of activation functions, each paired with its
+# derivative, expressed in terms of both its input and output.
+NUMPY_ACTIVATIONS = dict(
+    linear=(lambda a: a, lambda a, h: np.ones_like(a)),
+    relu=(lambda a: np.maximum(a, 0.), lambda a, h: np.greater(a, 0.) * 1.),
+    elu=(lambda a: np.where(a > 0., a, np.expm1(np.minimum(a, 0.))),
+         lambda a, h: np.where(a > 0., 1., h + 1.)),
+    tanh=(np.tanh, lambda a, h: 1. - np.square(h)),
+    sigmoid=(expit, lambda a, h: h * (1. - h)),
+    exponential=(np.exp, lambda a, h: h),
+)
+
+# Output transforms, and the names of their NumPy implementations above.
+NUMPY_TRANSFORMS = {
+    tf.identity: "linear",
+    tf.sigmoid: "sigmoid",
+    tf.exp: "exponential",
+}
+
+# Structure of the models checked by `is_recurrent` (see
+# `_recurrent_structure`), since inspecting their configuration costs about as
+# much as a short maximization.
+_RECURRENT_STRUCTURES = weakref.WeakKeyDictionary()
+
+# Derivatives of output transforms, expressed in terms of both their input
+# and output.
+TRANSFORM_GRADS = {
+    tf.identity: lambda u, v: tf.ones_like(u),
+    tf.sigmoid: lambda u, v: v * (1. - v),
+    tf.exp: lambda u, v: v,
+}
+
+
+def _value_and_gradient(value_fn, transform, negate, jit_compile,
+                        input_signature=None):
+    """
+    Build the function computing ``transform(sign * value_fn(x))`` and its
+    gradient, fusing the derivative of the transform into the backward pass
+    where it is known in closed form.
+    """
+    sign = -1. if negate else 1.
+
+    def logit_fn(x):
+        return sign * value_fn(x)
+
+    if transform in TRANSFORM_GRADS:
+        return transformed_value_and_gradient(logit_fn, transform,
+                                              TRANSFORM_GRADS[transform],
+                                              jit_compile=jit_compile,
+                                              input_signature=input_signature)
+
+    return value_and_gradient(lambda x: transform(logit_fn(x)),
+                              jit_compile=jit_compile,
+                              input_signature=input_signature)
+
+
+def convert(model, transform=tf.identity, negate=False, jit_compile=True):
     """
     Given a Keras model, builds a callable that takes a single array as input
     (rather than a batch of Tensors) and returns a pair containing the output
@@ -22,8 +91,19 @@ def convert(model, transform=tf.identity):
         shape ``(None, D)`` as input and returns as output a Tensor of
         shape ``(None, 1)``.
     transform : callable, optional
-        A function that transforms the output of the model, e.g. negating the
-        output effectively maximizes instead of minimizes it.
+        A function that transforms the output of the model. For
+        ``tf.identity``, ``tf.sigmoid`` and ``tf.exp``, the derivative of the
+        transform is applied in closed form rather than by differentiating
+        through it.
+    negate : bool, optional
+        Whether to negate the output of the model before applying the
+        transform (default: False), which effectively maximizes instead of
+        minimizes it.
+    jit_compile : bool, optional
+        Whether to compile the forward and backward pass with XLA
+        (default: True). Since ``scipy.optimize`` evaluates the function on
+        a single input at a time, the cost of each call is otherwise
+        dominated by the overhead of dispatching many tiny kernels.
 
     Returns
     -------
@@ -32,12 +112,392 @@ def convert(model, transform=tf.identity):
         a pair with shape ``(), (D,)``, consisting of the output scalar and the
         gradient vector.
     """
-    @numpy_io  # array input to Tensor and Tensor outputs back to array
-    @value_and_gradient  # `(D,) -> ()` to `(D,) -> (), (D,)`
     @squeeze(axis=-1)  # `(D,) -> (1,)` to `(D,) -> ()`
     @unbatch  # `(None, D) -> (None, 1)` to `(D,) -> (1,)`
+    def value_fn(x):
+        return model(x)
+
+    # `(D,) -> ()` to `(D,) -> (), (D,)`. Inputs from ``scipy.optimize``
+    # are always double-precision vectors, so a single trace suffices. The
+    # rank must be known for the model to be called, but the dimension is
+    # left unspecified, since the layers may not have been built yet.
+    input_spec = tf.TensorSpec(shape=(None,), dtype="float64")
+    fn = _value_and_gradient(value_fn, transform, negate, jit_compile,
+                             input_signature=[input_spec])
+
+    # array input to Tensor and Tensor outputs back to array
+    return numpy_io(fn)
+
+
+def convert_batch(model, transform=tf.identity, negate=False,
+                  jit_compile=True):
+    """
+    Given a Keras model, builds a callable that takes a batch of inputs and
+    returns a pair containing the output values and the gradient vectors
+    with respect to each input.
+
+    This is the batched counterpart to :func:`convert`. Since each output
+    depends only on its corresponding input, the gradient of the sum of the
+    outputs wrt the batch yields all the gradient vectors in a single
+    backward pass.
+
+    Parameters
+    ----------
+    model : a Keras model
+        A Keras model, or any batched TensorFlow operation, with output
+        dimension 1.
+    transform : callable, optional
+        A function that transforms the output of the model.
+    negate : bool, optional
+        Whether to negate the output of the model before applying the
+        transform (default: False).
+    jit_compile : bool, optional
+        Whether to compile the forward and backward pass with XLA
+        (default: True).
+
+    Returns
+    -------
+    fn : callable
+        A function that takes an array of shape ``(N, D)`` as input, and
+        returns a pair with shape ``(N,), (N, D)``, consisting of the output
+        values and the gradient vectors.
+    """
+    @squeeze(axis=-1)  # `(N, D) -> (N, 1)` to `(N, D) -> (N,)`
+    def value_fn(x):
+        return model(x)
+
+    # trace once for batches of any size, rather than once for each size
+    input_spec = tf.TensorSpec(shape=(None, None), dtype="float64")
+    fn = _value_and_gradient(value_fn, transform, negate, jit_compile,
+                             input_signature=[input_spec])
+
+    return numpy_io(fn)
+
+
+def is_dense(model, transform=tf.identity):
+    """
+    Determine whether a model consists solely of densely-connected layers,
+    with activations and output transform for which NumPy implementations
+    are available, i.e. whether it can be converted by
+    :func:`convert_dense`.
+    """
+    return transform in NUMPY_TRANSFORMS and bool(model.layers) and \
+        all(isinstance(layer, Dense) and layer.use_bias and
+            layer.get_config()["activation"] in NUMPY_ACTIVATIONS
+            for layer in model.layers)
+
+
+def convert_dense(model, transform=tf.identity, negate=False,
+                  jit_compile=True):
+    """
+    NumPy counterpart to :func:`convert_batch` for models consisting solely of
+    densely-connected layers (see :func:`is_dense`).
+
+    For such models, the gradient with respect to the inputs is a short chain
+    of matrix products, which we compute by hand with the current weights of
+    the model. For networks this small, this is considerably faster than
+    dispatching to TensorFlow on each evaluation. Note the weights are copied
+    when this function is called, so it must be called again after the model
+    has been updated.
+
+    Parameters
+    ----------
+    model : a Keras model
+        A Keras ``Sequential`` model with ``Dense`` layers, and output
+        dimension 1.
+    transform : callable, optional
+        A function that transforms the output of the model. Must be one of
+        ``tf.identity``, ``tf.sigmoid`` or ``tf.exp``.
+    negate : bool, optional
+        Whether to negate the output of the model before applying the
+        transform (default: False).
+    jit_compile : bool, optional
+        Whether to use the Numba-compiled implementation, if Numba is
+        installed (default: True).
+
+    Returns
+    -------
+    fn : callable
+        A function that takes an array of shape ``(N, D)`` (or ``(D,)``) as
+        input, and returns a pair with shape ``(N,), (N, D)`` (or
+        ``(), (D,)``), consisting of the output values and the gradient
+        vectors.
+    """
+    sign = -1. if negate else 1.
+    transform_name = NUMPY_TRANSFORMS[transform]
+
+    weights = []
+    activation_names = []
+    for layer in model.layers:
+        kernel, bias = layer.get_weights()
+        weights.append((kernel.astype("float64"), bias.astype("float64")))
+        activation_names.append(layer.get_config()["activation"])
+
+    if jit_compile and dense_value_and_gradient is not None:
+
+        kernels = List([kernel for kernel, _ in weights])
+        biases = List([bias for _, bias in weights])
+        activations = np.array([JIT_ACTIVATIONS[name]
+                                for name in activation_names])
+        transform_code = JIT_ACTIVATIONS[transform_name]
+
+        def jit_fn(x):
+            X = np.atleast_2d(np.asarray(x, dtype="float64"))
+            values, grads = dense_value_and_gradient(X, kernels, biases,
+                                                     activations,
+                                                     transform_code, sign)
+            if np.ndim(x) < 2:
+                return values[0], grads[0]
+            return values, grads
+
+        return jit_fn
+
+    transform_fn, transform_grad_fn = NUMPY_ACTIVATIONS[transform_name]
+    layers = [(kernel, bias, NUMPY_ACTIVATIONS[name])
+              for (kernel, bias), name in zip(weights, activation_names)]
+
     def fn(x):
-        return transform(model(x))
+
+        h = x
+        grads = []
+        for kernel, bias, (activation_fn, activation_grad_fn) in layers:
+            a = h @ kernel + bias
+            h = activation_fn(a)
+            grads.append(activation_grad_fn(a, h))
+
+        u = sign * np.squeeze(h, axis=-1)
+        value = transform_fn(u)
+
+        # backpropagate to the inputs
+        delta = np.expand_dims(sign * transform_grad_fn(u, value), axis=-1)
+        for (kernel, _, _), grad in zip(reversed(layers), reversed(grads)):
+            delta = (delta * grad) @ kernel.T
+
+        return value, delta
+
+    return fn
+
+
+def _is_lstm(layer, return_sequences):
+    if not (isinstance(layer, RNN) and isinstance(layer.cell, LSTMCell)):
+        return False
+    config = layer.get_config()
+    cell_config = layer.cell.get_config()
+    return config["return_sequences"] == return_sequences and \
+        not (config["return_state"] or config["go_backwards"] or
+             config["stateful"]) and cell_config["use_bias"] and \
+        cell_config["activation"] in NUMPY_ACTIVATIONS and \
+        cell_config["recurrent_activation"] in NUMPY_ACTIVATIONS
+
+
+def _recurrent_structure(model):
+    """
+    Get the number of steps, the activations of each LSTM layer, and the
+    activation of the final layer, of a one-to-one recurrent network (see
+    :func:`is_recurrent`), or ``None`` if the model is not one. These are
+    cached for each model (and number of layers).
+    """
+    num_layers, structure = _RECURRENT_STRUCTURES.get(model, (None, None))
+    if num_layers == len(model.layers):
+        return structure
+
+    structure = None
+    if len(model.layers) >= 3:
+        first, *middle, last = model.layers
+        if isinstance(first, RepeatVector) and \
+                all(_is_lstm(layer, return_sequences=(i < len(middle) - 1))
+                    for i, layer in enumerate(middle)) and \
+                isinstance(last, Dense) and last.use_bias and \
+                last.get_config()["activation"] in NUMPY_ACTIVATIONS:
+            cell_configs = [layer.cell.get_config() for layer in middle]
+            structure = (first.get_config()["n"],
+                         [(config["activation"],
+                           config["recurrent_activation"])
+                          for config in cell_configs],
+                         last.get_config()["activation"])
+
+    _RECURRENT_STRUCTURES[model] = (len(model.layers), structure)
+    return structure
+
+
+def is_recurrent(model, transform=tf.identity):
+    """
+    Determine whether a model is a one-to-one recurrent network, as built by
+    :meth:`~bore.models.StackedRecurrentFactory.build_one_to_one`, i.e. its
+    input is repeated over some number of steps and fed through a stack of
+    LSTM layers, the last of which only outputs its final state, followed
+    by a densely-connected layer, with activations and output transform for
+    which NumPy implementations are available, i.e. whether it can be
+    converted by :func:`convert_recurrent`.
+    """
+    return transform in NUMPY_TRANSFORMS and \
+        _recurrent_structure(model) is not None
+
+
+def convert_recurrent(model, transform=tf.identity, negate=False,
+                      jit_compile=True):
+    """
+    NumPy counterpart to :func:`convert_batch` for one-to-one recurrent
+    networks (see :func:`is_recurrent`).
+
+    As with :func:`convert_dense`, the gradient with respect to the inputs is
+    computed by hand (by backpropagation through time), with the current
+    weights of the model, which must therefore be converted again after the
+    model has been updated. Since the networks and number of steps involved
+    are small, this is considerably faster than dispatching to TensorFlow on
+    each evaluation.
+
+    Parameters
+    ----------
+    model : a Keras model
+        A Keras ``Sequential`` model with a ``RepeatVector`` layer, followed
+        by ``RNN`` layers of ``LSTMCell``, and a final ``Dense`` layer with
+        output dimension 1.
+    transform : callable, optional
+        A function that transforms the output of the model. Must be one of
+        ``tf.identity``, ``tf.sigmoid`` or ``tf.exp``.
+    negate : bool, optional
+        Whether to negate the output of the model before applying the
+        transform (default: False).
+    jit_compile : bool, optional
+        Whether to use the Numba-compiled implementation, if Numba is
+        installed (default: True).
+
+    Returns
+    -------
+    fn : callable
+        A function that takes an array of shape ``(N, D)`` (or ``(D,)``) as
+        input, and returns a pair with shape ``(N,), (N, D)`` (or
+        ``(), (D,)``), consisting of the output values and the gradient
+        vectors.
+    """
+    sign = -1. if negate else 1.
+    transform_name = NUMPY_TRANSFORMS[transform]
+
+    first, *middle, last = model.layers
+
+    # only the weights change from one call to the next
+    num_steps, activation_names, final_activation_name = \
+        _recurrent_structure(model)
+
+    cells = []
+    for layer, names in zip(middle, activation_names):
+        kernel, recurrent_kernel, bias = layer.cell.get_weights()
+        cells.append((kernel.astype("float64"),
+                      recurrent_kernel.astype("float64"),
+                      bias.astype("float64"), *names))
+
+    final_kernel, final_bias = (weight.astype("float64")
+                                for weight in last.get_weights())
+
+    if jit_compile and recurrent_value_and_gradient is not None:
+
+        kernels = List([cell[0] for cell in cells])
+        recurrent_kernels = List([cell[1] for cell in cells])
+        biases = List([cell[2] for cell in cells])
+        activations = np.array([JIT_ACTIVATIONS[cell[3]] for cell in cells])
+        recurrent_activations = np.array([JIT_ACTIVATIONS[cell[4]]
+                                          for cell in cells])
+        final_activation = JIT_ACTIVATIONS[final_activation_name]
+        transform_code = JIT_ACTIVATIONS[transform_name]
+
+        def jit_fn(x):
+            X = np.atleast_2d(np.asarray(x, dtype="float64"))
+            values, grads = recurrent_value_and_gradient(
+                X, num_steps, kernels, recurrent_kernels, biases,
+                activations, recurrent_activations, final_kernel,
+                final_bias, final_activation, transform_code, sign)
+            if np.ndim(x) < 2:
+                return values[0], grads[0]
+            return values, grads
+
+        return jit_fn
+
+    transform_fn, transform_grad_fn = NUMPY_ACTIVATIONS[transform_name]
+    final_activation_fn, final_activation_grad_fn = \
+        NUMPY_ACTIVATIONS[final_activation_name]
+    cells = [(kernel, recurrent_kernel, bias, NUMPY_ACTIVATIONS[name],
+              NUMPY_ACTIVATIONS[recurrent_name])
+             for kernel, recurrent_kernel, bias, name, recurrent_name in cells]
+
+    def fn(x):
+
+        X = np.atleast_2d(np.asarray(x, dtype="float64"))
+        num_samples = len(X)
+
+        # forward pass, retaining the quantities required for the backward
+        # pass at each step. The inputs to the first layer are the same at
+        # every step, as are their products with the kernel.
+        caches = []
+        inputs = [X @ cells[0][0]] * num_steps
+        for k, (kernel, recurrent_kernel, bias, (activation_fn, _),
+                (recurrent_activation_fn, _)) in enumerate(cells):
+
+            if k:
+                inputs = [h @ kernel for h in inputs]
+
+            num_units = len(recurrent_kernel)
+            h = np.zeros((num_samples, num_units))
+            c = np.zeros((num_samples, num_units))
+
+            cache = []
+            outputs = []
+            for t in range(num_steps):
+                a = inputs[t] + h @ recurrent_kernel + bias
+                # input, forget, cell and output gates (in Keras ordering)
+                a_i, a_f, a_c, a_o = np.split(a, 4, axis=-1)
+                i = recurrent_activation_fn(a_i)
+                f = recurrent_activation_fn(a_f)
+                g = activation_fn(a_c)
+                o = recurrent_activation_fn(a_o)
+                c_prev = c
+                c = f * c_prev + i * g
+                s = activation_fn(c)
+                h = o * s
+                cache.append((a_i, a_f, a_c, a_o, i, f, g, o, c_prev, c, s))
+                outputs.append(h)
+
+            caches.append(cache)
+            inputs = outputs
+
+        a = h @ final_kernel + final_bias
+        y = final_activation_fn(a)
+
+        u = sign * np.squeeze(y, axis=-1)
+        value = transform_fn(u)
+
+        # backpropagate through the final layer, and then through time
+        delta = np.expand_dims(sign * transform_grad_fn(u, value), axis=-1)
+        delta = (delta * final_activation_grad_fn(a, y)) @ final_kernel.T
+
+        deltas = [None] * (num_steps - 1) + [delta]
+        for (kernel, recurrent_kernel, _, (_, activation_grad_fn),
+             (_, recurrent_activation_grad_fn)), cache in zip(
+                reversed(cells), reversed(caches)):
+            delta_h = delta_c = 0.
+            deltas_prev = [None] * num_steps
+            for t in reversed(range(num_steps)):
+                a_i, a_f, a_c, a_o, i, f, g, o, c_prev, c, s = cache[t]
+                if deltas[t] is not None:
+                    delta_h = delta_h + deltas[t]
+                delta_c = delta_c + delta_h * o * activation_grad_fn(c, s)
+                delta_a = np.concatenate([
+                    delta_c * g * recurrent_activation_grad_fn(a_i, i),
+                    delta_c * c_prev * recurrent_activation_grad_fn(a_f, f),
+                    delta_c * i * activation_grad_fn(a_c, g),
+                    delta_h * s * recurrent_activation_grad_fn(a_o, o)],
+                    axis=-1)
+                deltas_prev[t] = delta_a @ kernel.T
+                delta_h = delta_a @ recurrent_kernel.T
+                delta_c = delta_c * f
+            deltas = deltas_prev
+
+        # the input is repeated at every step
+        grad = sum(deltas)
+
+        if np.ndim(x) < 2:
+            return value[0], grad[0]
+        return value, grad
 
     return fn
 
@@ -48,6 +508,33 @@ def truncated_normal(loc, scale, lower, upper):
     return truncnorm(a=a, b=b, loc=loc, scale=scale)
 
 
+def sample_truncated_normal(loc, scale, lower, upper, random_state=None):
+    """
+    Draw a sample from a truncated normal distribution by inverse transform
+    sampling.
+
+    Equivalent to ``truncated_normal(loc, scale, lower, upper).rvs()``, but
+    avoids constructing (and validating the arguments of) a frozen
+    ``scipy.stats`` distribution just to draw a single sample.
+    """
+    random_state = check_random_state(random_state)
+
+    a = (lower - loc) / scale
+    b = (upper - loc) / scale
+
+    # For numerical stability, sample from the lower tail of the reflected
+    # distribution where the truncation interval lies in the upper tail.
+    reflect = np.greater(a, 0.)
+    sign = np.where(reflect, -1., 1.)
+    cdf_a = ndtr(np.where(reflect, -b, a))
+    cdf_b = ndtr(np.where(reflect, -a, b))
+
+    u = random_state.uniform(size=np.shape(a))
+    z = sign * ndtri(cdf_a + u * (cdf_b - cdf_a))
+
+    return np.clip(loc + scale * z, lower, upper)
+
+
 def maybe_distort(loc, distortion=None, bounds=None, random_state=None,
                   print_fn=print):
 
@@ -55,10 +542,11 @@ def maybe_distort(loc, distortion=None, bounds=None, random_state=None,
         return loc
 
     assert bounds is not None, "must specify bounds!"
-    ret = truncated_normal(loc=loc,
-                           scale=distortion,
-                           lower=bounds.lb,
-                           upper=bounds.ub).rvs(random_state=random_state)
+    ret = sample_truncated_normal(loc=loc,
+                                  scale=distortion,
+                                  lower=bounds.lb,
+                                  upper=bounds.ub,
+                                  random_state=random_state)
     print_fn(f"Suggesting x={ret} (after applying distortion={distortion:.3E})")
 
     return ret
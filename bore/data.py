@@ -1,5 +1,7 @@
 import numpy as np
 
+from .math import quantile_sorted
+
 
 class Record:
 
@@ -8,6 +10,17 @@ class Record:
         self.targets = []
         self.budgets = []
 
+        # Features also maintained in a contiguous buffer, whose capacity is
+        # doubled whenever it is exhausted, to allow vectorized queries.
+        self._feature_buffer = None
+
+        # Targets maintained in ascending order, so that quantiles can be
+        # computed without re-sorting or partitioning the entire history.
+        self._targets_sorted = np.empty(0)
+        # Binary labels from the last call to `load_classification_data`,
+        # keyed by `gamma`, and invalidated whenever a new target is recorded.
+        self._labels = {}
+
     def size(self):
         return len(self.targets)
 
@@ -17,8 +30,30 @@ class Record:
         if b is not None:
             self.budgets.append(b)
 
+        n = self.size()
+        if self._feature_buffer is None:
+            self._feature_buffer = np.empty((16, len(x)))
+        elif n > len(self._feature_buffer):
+            self._feature_buffer = np.resize(self._feature_buffer,
+                                             (2 * len(self._feature_buffer),
+                                              len(x)))
+        self._feature_buffer[n-1] = x
+
+        i = np.searchsorted(self._targets_sorted, y)
+        self._targets_sorted = np.insert(self._targets_sorted, i, y)
+        self._labels.clear()
+
     def load_feature_matrix(self):
-        return np.vstack(self.features)
+        """
+        Get the inputs recorded so far, as a matrix.
+
+        This is a read-only view into the buffer maintained by :meth:`append`,
+        rather than a copy. Since inputs are only ever appended, the view
+        still holds the same inputs after any later calls to :meth:`append`.
+        """
+        X = self._feature_buffer[:self.size()]
+        X.flags.writeable = False
+        return X
 
     def load_target_vector(self):
         return np.hstack(self.targets)
@@ -28,10 +63,15 @@ class Record:
         y = self.load_target_vector()
         return X, y
 
+    def threshold(self, gamma):
+        return quantile_sorted(self._targets_sorted, q=gamma)
+
     def load_classification_data(self, gamma):
         X, y = self.load_regression_data()
-        tau = np.quantile(y, q=gamma)
-        z = np.less(y, tau)
+        z = self._labels.get(gamma)
+        if z is None:
+            tau = self.threshold(gamma)
+            z = self._labels.setdefault(gamma, np.less(y, tau))
         return X, z
 
     # def to_dataframe(self):
@@ -42,10 +82,12 @@ class Record:
     def is_duplicate(self, x, rtol=1e-5, atol=1e-8):
         # Clever ways of doing this would involve data structs. like KD-trees
         # or locality sensitive hashing (LSH), but these are premature
-        # optimizations at this point, especially since the `any` below does lazy
-        # evaluation, i.e. is early stopped as soon as anything returns `True`.
-        return any(np.allclose(x_prev, x, rtol=rtol, atol=atol)
-                   for x_prev in self.features)
+        # optimizations at this point. Equivalent to applying `np.allclose`
+        # to each previous input, but vectorized over all of them at once.
+        if not self.size():
+            return False
+        X = self.load_feature_matrix()
+        return bool(np.isclose(X, x, rtol=rtol, atol=atol).all(axis=1).any())
 
 
 class MultiFidelityRecord:
@@ -55,6 +97,16 @@ class MultiFidelityRecord:
         self._targets = {}
         self.gamma = gamma
 
+        # Same information as `self._data`, but maintained in contiguous
+        # buffers, whose capacity is doubled whenever it is exhausted, so
+        # that sequences can be assembled with vectorized operations. Each
+        # input is assigned a row (in order of first appearance), and each
+        # budget a column of values along with a mask of which are observed.
+        self._rows = {}
+        self._feature_buffer = None
+        self._value_buffers = {}
+        self._mask_buffers = {}
+
     @staticmethod
     def compute_key(x):
         return tuple(x.tolist())
@@ -72,12 +124,43 @@ class MultiFidelityRecord:
         ys = self._targets.setdefault(b, [])
         ys.append(y)
 
+        i = self._rows.setdefault(k, len(self._rows))
+        capacity = 0 if self._feature_buffer is None \
+            else len(self._feature_buffer)
+        if i >= capacity:
+            self._grow(max(16, 2 * capacity), len(x))
+        self._feature_buffer[i] = x
+
+        if b not in self._value_buffers:
+            capacity = len(self._feature_buffer)
+            self._value_buffers[b] = np.empty(capacity)
+            self._mask_buffers[b] = np.zeros(capacity, dtype=bool)
+        self._value_buffers[b][i] = y
+        self._mask_buffers[b][i] = True
+
         # TODO(LT): Decide how best to handle situation where y has already
         #   been recorded for a given (x, b)
         # if b in d and d[b] != y:
         #     print(f"target value for x={x} at budget b={b} already recorded! "
         #           f"Replacing... (old={d[b]:.3f}, new={y:.3f})")
 
+    def _grow(self, capacity, input_dim):
+        size = len(self._rows) - 1  # excluding row about to be written
+
+        feature_buffer = np.empty((capacity, input_dim))
+        if self._feature_buffer is not None:
+            feature_buffer[:size] = self._feature_buffer[:size]
+        self._feature_buffer = feature_buffer
+
+        for b in self._value_buffers:
+            value_buffer = np.empty(capacity)
+            value_buffer[:size] = self._value_buffers[b][:size]
+            self._value_buffers[b] = value_buffer
+
+            mask_buffer = np.zeros(capacity, dtype=bool)
+            mask_buffer[:size] = self._mask_buffers[b][:size]
+            self._mask_buffers[b] = mask_buffer
+
     def num_rungs(self):
         """
         Get the total number of rungs recorded.
@@ -222,40 +305,57 @@ class MultiFidelityRecord:
         else:
             return sequences
 
-    def sequences(self, pad_value=-1., binary=True):
-
-        sequences, indices = self.sequences_dict(pad_value=pad_value,
-                                                 binary=binary,
-                                                 return_indices=True)
-
-        input_sequences = []
-        target_sequences = []
-        for k, ys in sequences.items():
-
-            T = len(ys)
-            D = len(k)
+    def sequences(self, pad_value=-1., binary=True, dtype="float64"):
+        """
+        Create arrays of input and target sequences, padded with
+        ``pad_value`` at the rungs for which no value has been observed.
 
-            ind = indices[k]
-            x = np.array(k)
+        Equivalent to assembling the sequences from :meth:`sequences_dict`,
+        but gathered directly from the buffers maintained by :meth:`append`,
+        and written directly in the given ``dtype``.
 
-            input_sequence = np.full(shape=(T, D), fill_value=pad_value,
-                                     dtype="float64")
-            input_sequence[ind] = x
-            input_sequences.append(input_sequence)
+        Returns
+        -------
+        inputs : array of shape ``(N, T, D)``
+            Input sequences.
+        targets : array of shape ``(N, T, 1)``
+            Target sequences.
+        """
+        assert not binary or self.gamma is not None, \
+            "Must instantiate with `gamma` specified for binary labels!"
 
-            target_sequence = np.expand_dims(ys, axis=-1)
-            target_sequences.append(target_sequence)
+        n = self.num_features()
+        budgets = self.budgets()
 
-        inputs = np.stack(input_sequences, axis=0)
-        targets = np.stack(target_sequences, axis=0)
+        X = self._feature_buffer[:n]
+        values = np.column_stack([self._value_buffers[b][:n]
+                                  for b in budgets])
+        mask = np.column_stack([self._mask_buffers[b][:n] for b in budgets])
+
+        if binary:
+            thresholds = np.array([self._threshold_from_budget(b)
+                                   for b in budgets])
+            values = np.less_equal(values, thresholds)
+
+        inputs = np.full((n, len(budgets), X.shape[-1]), pad_value,
+                         dtype=dtype)
+        np.copyto(inputs, np.expand_dims(X, axis=1),
+                  where=np.expand_dims(mask, axis=-1), casting="unsafe")
+        targets = np.full((n, len(budgets), 1), pad_value, dtype=dtype)
+        np.copyto(targets[..., 0], values, where=mask, casting="unsafe")
         return inputs, targets
 
     def is_duplicate(self, x, rtol=1e-5, atol=1e-8):
         # Clever ways of doing this would involve data structs. like KD-trees
         # or locality sensitive hashing (LSH), but these are premature
-        # optimizations at this point, especially since the `any` below does
-        # lazy evaluation, i.e. is early stopped as soon as anything
-        # returns `True`.
-        # TODO(LT): We only need to look at the lowest rung.
-        return any(np.allclose(np.array(k), x, rtol=rtol, atol=atol)
-                   for k in self._data)
+        # optimizations at this point. Exact duplicates are found in constant
+        # time, since the inputs are already hashed to their rows. Otherwise,
+        # equivalent to applying `np.allclose` to each previous input, but
+        # vectorized over all of them at once.
+        n = self.num_features()
+        if not n:
+            return False
+        if self.compute_key(np.asarray(x)) in self._rows:
+            return True
+        X = self._feature_buffer[:n]
+        return bool(np.isclose(X, x, rtol=rtol, atol=atol).all(axis=1).any())
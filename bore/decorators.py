@@ -45,10 +45,10 @@ def unbatch(fn):
     return new_fn
 
 
-def value_and_gradient(value_fn):
+def value_and_gradient(value_fn, jit_compile=None, input_signature=None):
 
     @wraps(value_fn)
-    @tf.function
+    @tf.function(jit_compile=jit_compile, input_signature=input_signature)
     def value_and_gradient_fn(x):
 
         # Equivalent to `tfp.math.value_and_gradient(value_fn, x)`, with the
@@ -65,6 +65,39 @@ def value_and_gradient(value_fn):
     return value_and_gradient_fn
 
 
+def transformed_value_and_gradient(value_fn, transform, transform_grad,
+                                   jit_compile=None, input_signature=None):
+    """
+    Equivalent to ``value_and_gradient(lambda x: transform(value_fn(x)))``
+    for an elementwise ``transform`` whose derivative ``transform_grad`` is
+    given in closed form, in terms of both its input and output.
+
+    Only ``value_fn`` is differentiated; the chain rule through the transform
+    is applied directly in the same computation, reusing the transformed
+    value rather than evaluating the transform a second time for its
+    derivative.
+    """
+    @wraps(value_fn)
+    @tf.function(jit_compile=jit_compile, input_signature=input_signature)
+    def value_and_gradient_fn(x):
+
+        with tf.GradientTape(watch_accessed_variables=False) as tape:
+            tape.watch(x)
+            u = value_fn(x)
+
+        grad_u = tape.gradient(u, x)
+
+        val = transform(u)
+        # gradients are in the `dtype` of the inputs, which may differ from
+        # that of the outputs
+        val_grad = tf.cast(transform_grad(u, val), dtype=grad_u.dtype)
+        grad = tf.expand_dims(val_grad, axis=-1) * grad_u
+
+        return val, grad
+
+    return value_and_gradient_fn
+
+
 def numpy_io(fn):
 
     @wraps(fn)
@@ -0,0 +1,238 @@
+import numpy as np
+
+from numba import njit
+
+# Codes for activation functions (and output transforms)
+LINEAR, RELU, ELU, TANH, SIGMOID, EXP = range(6)
+
+ACTIVATIONS = dict(linear=LINEAR, relu=RELU, elu=ELU, tanh=TANH,
+                   sigmoid=SIGMOID, exponential=EXP)
+
+
+@njit(cache=True, fastmath=True)
+def activation(code, a):
+    if code == RELU:
+        return max(a, 0.)
+    elif code == ELU:
+        return a if a > 0. else np.expm1(a)
+    elif code == TANH:
+        return np.tanh(a)
+    elif code == SIGMOID:
+        return 1. / (1. + np.exp(-a))
+    elif code == EXP:
+        return np.exp(a)
+    return a
+
+
+@njit(cache=True, fastmath=True)
+def activation_grad(code, a, h):
+    # derivative, expressed in terms of both the input and output
+    if code == RELU:
+        return 1. if a > 0. else 0.
+    elif code == ELU:
+        return 1. if a > 0. else h + 1.
+    elif code == TANH:
+        return 1. - h * h
+    elif code == SIGMOID:
+        return h * (1. - h)
+    elif code == EXP:
+        return h
+    return 1.
+
+
+@njit(cache=True, fastmath=True)
+def dense_value_and_gradient(X, kernels, biases, activations, transform,
+                             sign):
+    """
+    Compute the transformed output of a network of densely-connected layers,
+    and its gradient wrt the inputs, for each row of ``X``.
+
+    The weights of each layer are given by the typed lists ``kernels`` and
+    ``biases``, and the activation function of each layer, along with the
+    output transform, by their codes.
+    """
+    num_samples, input_dim = X.shape
+    num_layers = len(kernels)
+
+    values = np.empty(num_samples)
+    grads = np.empty((num_samples, input_dim))
+
+    for n in range(num_samples):
+
+        # forward pass, retaining the derivatives of the activations
+        h = X[n].copy()
+        derivs = []
+        for k in range(num_layers):
+            kernel = kernels[k]
+            a = biases[k].copy()
+            for i in range(kernel.shape[0]):
+                for j in range(kernel.shape[1]):
+                    a[j] += h[i] * kernel[i, j]
+            h = np.empty_like(a)
+            deriv = np.empty_like(a)
+            for j in range(a.shape[0]):
+                h[j] = activation(activations[k], a[j])
+                deriv[j] = activation_grad(activations[k], a[j], h[j])
+            derivs.append(deriv)
+
+        u = sign * h[0]
+        value = activation(transform, u)
+
+        # backward pass
+        delta = np.full(1, sign * activation_grad(transform, u, value))
+        for k in range(num_layers - 1, -1, -1):
+            kernel = kernels[k]
+            deriv = derivs[k]
+            delta_prev = np.zeros(kernel.shape[0])
+            for i in range(kernel.shape[0]):
+                for j in range(kernel.shape[1]):
+                    delta_prev[i] += kernel[i, j] * delta[j] * deriv[j]
+            delta = delta_prev
+
+        values[n] = value
+        grads[n] = delta
+
+    return values, grads
+
+
+@njit(cache=True, fastmath=True)
+def recurrent_value_and_gradient(X, num_steps, kernels, recurrent_kernels,
+                                 biases, activations, recurrent_activations,
+                                 final_kernel, final_bias, final_activation,
+                                 transform, sign):
+    """
+    Compute the transformed output of a one-to-one network of stacked LSTM
+    layers, whose input is repeated over ``num_steps`` steps, followed by a
+    densely-connected layer, and its gradient wrt the inputs, for each row of
+    ``X``.
+
+    The weights of each LSTM layer are given by the typed lists ``kernels``,
+    ``recurrent_kernels`` and ``biases``, with the gates in Keras ordering
+    (input, forget, cell, output), and the activation functions of each
+    layer, along with those of the final layer and the output transform, by
+    their codes.
+    """
+    num_samples, input_dim = X.shape
+    num_layers = len(kernels)
+
+    values = np.empty(num_samples)
+    grads = np.empty((num_samples, input_dim))
+
+    for n in range(num_samples):
+
+        # forward pass, retaining the pre-activations, gate values and cell
+        # states of each layer at each step
+        H = np.empty((num_steps, input_dim))
+        for t in range(num_steps):
+            H[t] = X[n]
+        As = []
+        Gs = []
+        Cs = []
+        Ss = []
+        for k in range(num_layers):
+            kernel = kernels[k]
+            recurrent_kernel = recurrent_kernels[k]
+            num_units = recurrent_kernel.shape[0]
+            A = np.empty((num_steps, 4 * num_units))
+            G = np.empty((num_steps, 4 * num_units))
+            C = np.zeros((num_steps + 1, num_units))
+            S = np.empty((num_steps, num_units))
+            H_next = np.empty((num_steps, num_units))
+            h = np.zeros(num_units)
+            for t in range(num_steps):
+                a = biases[k].copy()
+                for i in range(kernel.shape[0]):
+                    for j in range(kernel.shape[1]):
+                        a[j] += H[t, i] * kernel[i, j]
+                for i in range(num_units):
+                    for j in range(4 * num_units):
+                        a[j] += h[i] * recurrent_kernel[i, j]
+                for j in range(4 * num_units):
+                    # the third block of gates (cell) uses the activation,
+                    # the rest the recurrent activation
+                    code = activations[k] \
+                        if num_units * 2 <= j < num_units * 3 \
+                        else recurrent_activations[k]
+                    G[t, j] = activation(code, a[j])
+                for j in range(num_units):
+                    C[t + 1, j] = G[t, num_units + j] * C[t, j] + \
+                        G[t, j] * G[t, 2 * num_units + j]
+                    S[t, j] = activation(activations[k], C[t + 1, j])
+                    h[j] = G[t, 3 * num_units + j] * S[t, j]
+                A[t] = a
+                H_next[t] = h
+            As.append(A)
+            Gs.append(G)
+            Cs.append(C)
+            Ss.append(S)
+            H = H_next
+
+        h = H[num_steps - 1]
+        y = final_bias[0]
+        for i in range(final_kernel.shape[0]):
+            y += h[i] * final_kernel[i, 0]
+        a_final = y
+        y = activation(final_activation, a_final)
+
+        u = sign * y
+        value = activation(transform, u)
+
+        # backpropagate through the final layer, and then through time
+        delta = sign * activation_grad(transform, u, value) * \
+            activation_grad(final_activation, a_final, y)
+        Delta = np.zeros((num_steps, final_kernel.shape[0]))
+        for i in range(final_kernel.shape[0]):
+            Delta[num_steps - 1, i] = delta * final_kernel[i, 0]
+
+        for k in range(num_layers - 1, -1, -1):
+            kernel = kernels[k]
+            recurrent_kernel = recurrent_kernels[k]
+            num_units = recurrent_kernel.shape[0]
+            A = As[k]
+            G = Gs[k]
+            C = Cs[k]
+            S = Ss[k]
+            Delta_prev = np.zeros((num_steps, kernel.shape[0]))
+            delta_h = np.zeros(num_units)
+            delta_c = np.zeros(num_units)
+            delta_a = np.empty(4 * num_units)
+            for t in range(num_steps - 1, -1, -1):
+                for j in range(num_units):
+                    delta_h[j] += Delta[t, j]
+                    i_j = G[t, j]
+                    f_j = G[t, num_units + j]
+                    g_j = G[t, 2 * num_units + j]
+                    o_j = G[t, 3 * num_units + j]
+                    delta_c[j] += delta_h[j] * o_j * \
+                        activation_grad(activations[k], C[t + 1, j], S[t, j])
+                    delta_a[j] = delta_c[j] * g_j * \
+                        activation_grad(recurrent_activations[k], A[t, j],
+                                        i_j)
+                    delta_a[num_units + j] = delta_c[j] * C[t, j] * \
+                        activation_grad(recurrent_activations[k],
+                                        A[t, num_units + j], f_j)
+                    delta_a[2 * num_units + j] = delta_c[j] * i_j * \
+                        activation_grad(activations[k],
+                                        A[t, 2 * num_units + j], g_j)
+                    delta_a[3 * num_units + j] = delta_h[j] * S[t, j] * \
+                        activation_grad(recurrent_activations[k],
+                                        A[t, 3 * num_units + j], o_j)
+                for i in range(kernel.shape[0]):
+                    for j in range(4 * num_units):
+                        Delta_prev[t, i] += kernel[i, j] * delta_a[j]
+                for i in range(num_units):
+                    delta_h[i] = 0.
+                    for j in range(4 * num_units):
+                        delta_h[i] += recurrent_kernel[i, j] * delta_a[j]
+                for j in range(num_units):
+                    delta_c[j] *= G[t, num_units + j]
+            Delta = Delta_prev
+
+        values[n] = value
+        # the input is repeated at every step
+        for i in range(input_dim):
+            grads[n, i] = 0.
+            for t in range(num_steps):
+                grads[n, i] += Delta[t, i]
+
+    return values, grads
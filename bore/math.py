@@ -27,3 +27,29 @@ def steps_per_epoch(dataset_size, batch_size):
     16
     """
     return int(ceil_divide(dataset_size, batch_size))
+
+
+def quantile_sorted(a, q):
+    """
+    Compute the q-th quantile of an array that is already sorted in
+    ascending order, using linear interpolation between the closest ranks.
+
+    This is equivalent to ``np.quantile(a, q)``, but avoids having to
+    partition the array, which takes constant rather than linear time.
+
+    Examples
+    --------
+    >>> quantile_sorted(np.array([1., 2., 3., 4.]), q=0.25)
+    1.75
+
+    >>> quantile_sorted(np.array([1., 2., 3., 4., 5.]), q=0.5)
+    3.0
+    """
+    index = q * (len(a) - 1)
+    lower = int(np.floor(index))
+    upper = min(lower + 1, len(a) - 1)
+    t = index - lower
+    # as in ``np.quantile``, interpolate from the nearer of the two ranks
+    if t < 0.5:
+        return a[lower] + (a[upper] - a[lower]) * t
+    return a[upper] - (a[upper] - a[lower]) * (1 - t)
@@ -1,11 +1,14 @@
 import numpy as np
 import tensorflow as tf
 
-from scipy.optimize import minimize, OptimizeResult
+from scipy.optimize import OptimizeResult
 from sklearn.utils import check_random_state
 
-from .base import convert
-from .optimizers.utils import from_bounds
+from .base import (convert, convert_batch, convert_dense, convert_recurrent,
+                   is_dense, is_recurrent)
+from .optimizers import (minimize_batch, minimize_lockstep,
+                         minimize_warm_start, minimize_jac)
+from .optimizers.utils import from_bounds, boltzmann_sample
 from .optimizers.svgd import SVGD
 from .optimizers.svgd.base import DistortionConstant, DistortionExpDecay
 from .optimizers.svgd.kernels import RadialBasis
@@ -15,13 +18,39 @@ class MaximizableMixin:
 
     def __init__(self, transform=tf.identity, *args, **kwargs):
         super(MaximizableMixin, self).__init__(*args, **kwargs)
+        self._transform = transform
         # negate to turn into minimization problem for ``scipy.optimize``
         # interface
-        self._func_min = convert(self, transform=lambda u: transform(-u))
+        self._func_min = convert(self, transform=transform, negate=True)
+        self._func_min_batch = convert_batch(self, transform=transform,
+                                             negate=True)
+        # compiled forward pass for screening candidate starting points, with
+        # a single trace for batches of any size
+        self._predict_fn = tf.function(
+            lambda x: self(x, training=False), jit_compile=True,
+            input_signature=[tf.TensorSpec(shape=(None, None),
+                                           dtype="float64")])
 
     def maxima(self, bounds, num_starts=5, num_samples=1024, method="L-BFGS-B",
-               options=dict(maxiter=1000, ftol=1e-9), print_fn=print,
-               random_state=None):
+               options=dict(maxiter=1000, ftol=1e-9), candidates=None,
+               init_strategy="best", batch=False, lockstep=False,
+               warm_start=False, print_fn=print, random_state=None):
+        """
+        Maximize the (transformed) model output from multiple starting points.
+
+        By default, the minimizer is run from each starting point in turn.
+        At most one of the following alternatives may be specified:
+
+        - ``batch``: a single minimizer is run on the sum over all starting
+          points (see :func:`minimize_batch`), so they share one convergence
+          test, and all results report the same ``status`` and ``nit``.
+        - ``lockstep``: a separate minimizer is run from each starting point,
+          but the model is evaluated on all of their inputs at once (see
+          :func:`minimize_lockstep`).
+        - ``warm_start``: the minimizers are run in succession, each warm-
+          started with the curvature information of the last (see
+          :func:`minimize_warm_start`).
+        """
 
         # TODO(LT): Deprecated until minor bug fixed.
         # return minimize_multi_start(self._func_min, bounds=bounds,
@@ -32,6 +61,11 @@ class MaximizableMixin:
 
         random_state = check_random_state(random_state)
 
+        if candidates is not None:
+            # candidate starting points given explicitly, e.g. from a
+            # low-discrepancy sequence
+            num_samples = len(candidates)
+
         assert num_samples is not None, "`num_samples` must be specified!"
         assert num_samples > 0, "`num_samples` must be positive integer!"
 
@@ -42,23 +76,76 @@ class MaximizableMixin:
             "number of random samples (`num_samples`) must be " \
             "greater than number of starting points (`num_starts`)"
 
+        assert init_strategy in ("best", "boltzmann"), \
+            "`init_strategy` must be one of ('best', 'boltzmann')"
+
+        assert batch + lockstep + warm_start <= 1, \
+            "at most one of `batch`, `lockstep` and `warm_start` may be set"
+
         (low, high), dim = from_bounds(bounds)
 
-        # TODO(LT): Allow alternative arbitary generator function callbacks
-        # to support e.g. Gaussian sampling, low-discrepancy sequences, etc.
-        X_init = random_state.uniform(low=low, high=high, size=(num_samples, dim))
-        z_init = self.predict(X_init).squeeze(axis=-1)
+        if candidates is None:
+            X_init = random_state.uniform(low=low, high=high,
+                                          size=(num_samples, dim))
+        else:
+            X_init = np.asarray(candidates, dtype="float64")
+        # evaluate all candidates in a single forward pass, rather than
+        # through `predict`, which splits its inputs into small batches
+        z_init = self._predict_fn(X_init).numpy().squeeze(axis=-1)
         # the function to minimize is negative of the classifier output
         f_init = - z_init
 
+        func_min = self._func_min
+        func_min_batch = self._func_min_batch
+        if is_dense(self, transform=self._transform):
+            # compute value and gradient directly in NumPy, using a snapshot
+            # of the current weights
+            func_min = func_min_batch = convert_dense(
+                self, transform=self._transform, negate=True)
+        elif is_recurrent(self, transform=self._transform):
+            # likewise, backpropagating through time by hand
+            func_min = func_min_batch = convert_recurrent(
+                self, transform=self._transform, negate=True)
+
         results = []
         if num_starts > 0:
-            ind = np.argpartition(f_init, kth=num_starts-1, axis=None)
-            for i in range(num_starts):
-                x0 = X_init[ind[i]]
-                result = minimize(self._func_min, x0=x0, method=method,
-                                  jac=True, bounds=bounds, options=options)
-                results.append(result)
+            if init_strategy == "boltzmann":
+                # sample starting points in proportion to their (transformed)
+                # values, so they are not all drawn from the same basin
+                a_init = self._transform(z_init).numpy()
+                ind = boltzmann_sample(a_init, num_samples=num_starts,
+                                       random_state=random_state)
+            else:
+                ind = np.argpartition(f_init, kth=num_starts-1, axis=None)
+            if lockstep:
+                # run a separate minimizer for each start, but evaluate the
+                # network on the inputs of all unconverged starts at once
+                results = minimize_lockstep(func_min_batch,
+                                            x0=X_init[ind[:num_starts]],
+                                            bounds=bounds, method=method,
+                                            jac=True, options=options)
+            elif batch:
+                # run all starts simultaneously, evaluating the network on
+                # the whole batch of candidates at each iteration
+                results = minimize_batch(func_min_batch,
+                                         x0=X_init[ind[:num_starts]],
+                                         bounds=bounds, method=method,
+                                         jac=True, options=options)
+            elif warm_start:
+                # run starts in succession, carrying over the curvature
+                # information from one start to the next
+                results = minimize_warm_start(func_min,
+                                              x0=X_init[ind[:num_starts]],
+                                              bounds=bounds, method=method,
+                                              jac=True, options=options)
+            else:
+                for i in range(num_starts):
+                    x0 = X_init[ind[i]]
+                    result = minimize_jac(func_min, x0=x0, method=method,
+                                          jac=True, bounds=bounds,
+                                          options=options)
+                    results.append(result)
+            for i, result in enumerate(results):
                 # TODO(LT): Make this message a customizable option.
                 print_fn(f"[Maximum {i+1:02d}: value={result.fun:.3f}] "
                          f"success: {result.success}, "
@@ -73,20 +160,24 @@ class MaximizableMixin:
 
     def argmax(self, bounds, filter_fn=lambda res: True, *args, **kwargs):
 
-        # Equivalent to:
-        # res_best = min(filter(lambda res: res.success or res.status == 1,
-        #                       self.maxima(bounds, *args, **kwargs)),
-        #                key=lambda res: res.fun)
-        res_best = None
-        for i, res in enumerate(self.maxima(bounds, *args, **kwargs)):
-            # TODO(LT): Create Enum type for these status codes.
-            # `status == 1` signifies maximum iteration reached, which we don't
-            # want to treat as a failure condition.
-            if (res.success or res.status == 1) and filter_fn(res):
-                if res_best is None or res.fun < res_best.fun:
-                    res_best = res
-
-        return res_best
+        # TODO(LT): Create Enum type for these status codes.
+        # `status == 1` signifies maximum iteration reached, which we don't
+        # want to treat as a failure condition.
+        results = self.maxima(bounds, *args, **kwargs)
+
+        success = np.array([res.success or res.status == 1 for res in results],
+                           dtype=bool)
+        values = np.array([res.fun for res in results], dtype="float64")
+
+        # Visit the successful results in order of value and return the first
+        # that is accepted by `filter_fn`, so that (potentially expensive)
+        # checks, e.g. for duplicates, are not carried out on inferior results.
+        ind = np.argsort(np.where(success, values, np.inf))
+        for i in ind[:np.count_nonzero(success)]:
+            if filter_fn(results[i]):
+                return results[i]
+
+        return None
 
 
 class BatchMaximizableMixin(MaximizableMixin):
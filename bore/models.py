@@ -45,6 +45,42 @@ class BatchMaximizableDenseSequential(BatchMaximizableMixin, DenseSequential):
     pass
 
 
+def reset_weights(model):
+    """
+    Re-initialize the weights of a model in-place, and reset the state of its
+    optimizer (if it has been compiled).
+
+    Unlike building a new model (and clearing the session), this preserves
+    any functions traced (and compiled) for the model and its optimizer.
+    """
+    for layer in model.layers:
+        for weight_name, initializer_name in (("kernel", "kernel_initializer"),
+                                              ("bias", "bias_initializer")):
+            weight = getattr(layer, weight_name, None)
+            initializer = getattr(layer, initializer_name, None)
+            if weight is None or initializer is None:
+                continue
+            # Use a fresh instance since, if unseeded, the same instance may
+            # return identical values each time it is called.
+            initializer = initializer.__class__.from_config(
+                initializer.get_config())
+            weight.assign(initializer(weight.shape, dtype=weight.dtype))
+
+    optimizer = getattr(model, "optimizer", None)
+    if optimizer is not None:
+        # The state of the optimizers we use (e.g. the iteration count and
+        # moment estimates of Adam) is initialized to zero. Since Keras 3,
+        # this also includes the learning rate, which must be left as is.
+        variables = optimizer.variables
+        # a method in older versions of Keras, but a property since
+        if callable(variables):
+            variables = variables()
+        for variable in variables:
+            if variable is optimizer.learning_rate:
+                continue
+            variable.assign(tf.zeros_like(variable))
+
+
 class StackedRecurrentFactory:
 
     def __init__(self, input_dim, output_dim, num_layers=2, num_units=32,
@@ -78,7 +114,10 @@ class StackedRecurrentFactory:
         network = Sequential()
         network.add(Masking(mask_value=mask_value, input_shape=input_shape))
         for cell in self.cells:
-            network.add(RNN(cell, return_sequences=True))
+            # the recurrent layer must compute in the same precision as the
+            # cell, so that its states are of the same `dtype`
+            network.add(RNN(cell, return_sequences=True,
+                            dtype=cell.dtype_policy))
         network.add(TimeDistributed(self.final_layer))
         return network
 
@@ -97,7 +136,8 @@ class StackedRecurrentFactory:
         for i, cell in enumerate(self.cells):
             # equivalent to True if not final layer else False
             return_sequences = (i < num_layers - 1)
-            network.add(RNN(cell, return_sequences=return_sequences))
+            network.add(RNN(cell, return_sequences=return_sequences,
+                            dtype=cell.dtype_policy))
         network.add(self.final_layer)
         # network.add(Activation(activation))
 
@@ -1,3 +1,5 @@
-from .base import minimize_multi_start
+from .base import (minimize_multi_start, minimize_batch, minimize_lockstep,
+                   minimize_warm_start, minimize_jac)
 
-__all__ = ["minimize_multi_start"]
+__all__ = ["minimize_multi_start", "minimize_batch", "minimize_lockstep",
+           "minimize_warm_start", "minimize_jac"]
@@ -1,8 +1,25 @@
-from scipy.optimize import minimize
+import threading
+import numpy as np
+import scipy
+
+from scipy.optimize import minimize, Bounds, OptimizeResult
 from sklearn.utils import check_random_state
 
 from .utils import from_bounds
 
+try:  # private entry points, subject to change between SciPy versions
+    from scipy.optimize._lbfgsb_py import _minimize_lbfgsb
+    from scipy.optimize._optimize import MemoizeJac
+except ImportError:
+    _minimize_lbfgsb = None
+
+# Since SciPy 1.15, the L-BFGS-B solver is implemented in C and keeps all of
+# its state in the arrays passed to it, so that several instances can safely
+# be run concurrently. The same is not known to hold for the Fortran code it
+# replaced, nor for any other solver.
+_LOCKSTEP_THREAD_SAFE = \
+    tuple(map(int, scipy.__version__.split(".")[:2])) >= (1, 15)
+
 
 # TODO(LT): Deprecated until minor bug fixed.
 def multi_start(minimizer_fn=minimize):
@@ -65,3 +82,285 @@ def multi_start(minimizer_fn=minimize):
 
 
 minimize_multi_start = multi_start(minimizer_fn=minimize)
+
+
+def minimize_jac(fn, x0, bounds, method="L-BFGS-B", jac=True, options=None,
+                 **kwargs):
+    """
+    Equivalent to ``scipy.optimize.minimize(fn, x0, bounds=bounds,
+    method=method, jac=True, options=options)``.
+
+    For L-BFGS-B, the solver is called directly, bypassing the argument
+    checking and standardization carried out by ``minimize`` on every call,
+    which is significant relative to the cost of solving the small problems
+    we deal with. Falls back to ``minimize`` for any other method or option,
+    or if the solver cannot be imported from this version of SciPy.
+    """
+    assert jac, "`jac` must be true"
+
+    if _minimize_lbfgsb is None or method.lower() != "l-bfgs-b" or kwargs:
+        return minimize(fn, x0=x0, bounds=bounds, method=method, jac=True,
+                        options=options, **kwargs)
+
+    (low, high), _ = from_bounds(bounds)
+
+    fn_memo = MemoizeJac(fn)
+    return _minimize_lbfgsb(fn_memo, np.asarray(x0, dtype="float64"),
+                            jac=fn_memo.derivative,
+                            bounds=list(zip(low, high)),
+                            **(options or {}))
+
+
+def minimize_batch(fn, x0, bounds, **kwargs):
+    """
+    Minimize a function from a batch of starting points simultaneously.
+
+    Rather than running the minimizer once for each starting point, a single
+    minimizer is run on the sum of the function values over the batch. Since
+    the terms of this sum are independent, its minimizer is the concatenation
+    of the minimizers from each starting point, and its gradient is simply
+    the concatenation of the individual gradients. This lets us evaluate the
+    function on the whole batch in a single call at each iteration.
+
+    Parameters
+    ----------
+    fn : callable
+        A function that takes an array of shape ``(N, D)`` as input, and
+        returns a pair with shape ``(N,), (N, D)``, consisting of the output
+        values and gradient vectors.
+    x0 : array of shape ``(N, D)``
+        Batch of starting points.
+    bounds : sequence or `Bounds`
+        Bounds on the variables.
+
+    Returns
+    -------
+    results : list of `OptimizeResult`
+        A list of `scipy.optimize.OptimizeResult` objects, one for each
+        starting point. The number of iterations, status and message are
+        those of the minimizer shared across the batch.
+    """
+    assert "jac" not in kwargs or kwargs["jac"], "`jac` must be true"
+
+    num_starts, dim = x0.shape
+    (low, high), _ = from_bounds(bounds)
+
+    bounds_batch = Bounds(lb=np.tile(low, num_starts),
+                          ub=np.tile(high, num_starts))
+
+    # the individual values at the solution are usually those of the last
+    # evaluation, in which case there is no need to evaluate it again
+    last = {}
+
+    def fn_sum(x):
+        values, grads = fn(x.reshape(num_starts, dim))
+        last.update(x=x.copy(), values=values)
+        return np.sum(values, dtype="float64"), grads.ravel()
+
+    result = minimize_jac(fn_sum, x0=x0.ravel(), bounds=bounds_batch,
+                          **kwargs)
+
+    X = result.x.reshape(num_starts, dim)
+    if np.array_equal(last.get("x"), result.x):
+        values = last["values"]
+    else:
+        values, _ = fn(X)
+
+    results = []
+    for i in range(num_starts):
+        results.append(OptimizeResult(x=X[i], fun=values[i],
+                                      success=result.success,
+                                      status=result.status,
+                                      message=result.message,
+                                      nit=result.nit, nfev=result.nfev))
+
+    return results
+
+
+def minimize_warm_start(fn, x0, bounds, **kwargs):
+    """
+    Minimize a function from multiple starting points in succession, warm-
+    starting each run with the inverse Hessian approximation of the previous.
+
+    The starting points are ordered by their projection onto their first
+    principal direction, so that successive runs tend to start nearby, where
+    the curvature information accumulated by the previous run is most
+    relevant. Since ``scipy.optimize.minimize`` does not accept an initial
+    Hessian approximation, it is used instead to take a single quasi-Newton
+    step from each starting point, which is accepted only if it decreases
+    the function value, before handing off to the minimizer.
+
+    Parameters
+    ----------
+    fn : callable
+        A function that takes an array of shape ``(D,)`` as input, and returns
+        a pair with shape ``(), (D,)``, consisting of the output value and the
+        gradient vector.
+    x0 : array of shape ``(N, D)``
+        Starting points.
+    bounds : sequence or `Bounds`
+        Bounds on the variables.
+
+    Returns
+    -------
+    results : list of `OptimizeResult`
+        A list of `scipy.optimize.OptimizeResult` objects, one for each
+        starting point (in the order given).
+    """
+    assert "jac" not in kwargs or kwargs["jac"], "`jac` must be true"
+
+    num_starts, _ = x0.shape
+    (low, high), _ = from_bounds(bounds)
+
+    x0_centered = x0 - np.mean(x0, axis=0)
+    _, _, vh = np.linalg.svd(x0_centered, full_matrices=False)
+    order = np.argsort(x0_centered @ vh[0])
+
+    # the minimizer begins by evaluating its starting point, which will have
+    # already been evaluated in deciding whether to take the step
+    cache = {}
+
+    def fn_cached(x):
+        key = x.tobytes()
+        if key not in cache:
+            cache[key] = fn(x)
+        return cache[key]
+
+    results = [None] * num_starts
+    hess_inv = None
+    for i in order:
+
+        cache.clear()
+
+        x_init = x0[i]
+        if hess_inv is not None:
+            value, grad = fn_cached(x_init)
+            x_step = np.clip(x_init - hess_inv.dot(grad), low, high)
+            value_step, _ = fn_cached(x_step)
+            if value_step < value:
+                x_init = x_step
+            # account for the evaluation at the point not started from
+            nfev = 1
+        else:
+            nfev = 0
+
+        result = minimize_jac(fn_cached, x0=x_init, bounds=bounds, **kwargs)
+        result.nfev += nfev
+        results[i] = result
+
+        hess_inv = result.get("hess_inv")
+
+    return results
+
+
+def minimize_lockstep(fn, x0, bounds, **kwargs):
+    """
+    Minimize a function from a batch of starting points, running a separate
+    minimizer for each starting point, but in lockstep.
+
+    Each minimizer runs in its own thread and retains its own state (and
+    hence its own convergence criteria, number of iterations, etc.), but
+    rather than evaluating the function itself, it waits until every other
+    minimizer that has yet to converge also requires an evaluation. The
+    function is then evaluated on all of the requested inputs in a single
+    call. Unlike :func:`minimize_batch`, minimizers that have converged no
+    longer contribute to the batch.
+
+    Only L-BFGS-B with SciPy 1.15 or later is run in this way. Otherwise, the
+    minimizers are instead run one after another, evaluating the function on
+    a single input at a time, which gives the same results.
+
+    Parameters
+    ----------
+    fn : callable
+        A function that takes an array of shape ``(N, D)`` as input, and
+        returns a pair with shape ``(N,), (N, D)``, consisting of the output
+        values and gradient vectors.
+    x0 : array of shape ``(N, D)``
+        Batch of starting points.
+    bounds : sequence or `Bounds`
+        Bounds on the variables.
+
+    Returns
+    -------
+    results : list of `OptimizeResult`
+        A list of `scipy.optimize.OptimizeResult` objects, one for each
+        starting point.
+    """
+    assert "jac" not in kwargs or kwargs["jac"], "`jac` must be true"
+
+    method = kwargs.get("method", "L-BFGS-B")
+    if not _LOCKSTEP_THREAD_SAFE or method.lower() != "l-bfgs-b":
+
+        def fn_single(x):
+            values, grads = fn(np.expand_dims(x, axis=0))
+            return values[0], grads[0]
+
+        return [minimize_jac(fn_single, x0=x, bounds=bounds, **kwargs)
+                for x in x0]
+
+    num_starts, _ = x0.shape
+
+    cond = threading.Condition()
+    active = set(range(num_starts))
+    requests = {}  # inputs awaiting evaluation, by starting point
+    responses = {}  # outputs awaiting collection, by starting point
+    failed = threading.Event()
+
+    results = [None] * num_starts
+    errors = []
+
+    def make_fn(i):
+
+        def fn_i(x):
+            with cond:
+                requests[i] = x.copy()
+                cond.notify_all()
+                cond.wait_for(lambda: i in responses or failed.is_set())
+                if failed.is_set():
+                    raise RuntimeError("Evaluation of batch failed.")
+                return responses.pop(i)
+
+        return fn_i
+
+    def run(i):
+        try:
+            results[i] = minimize_jac(make_fn(i), x0=x0[i], bounds=bounds,
+                                      **kwargs)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            with cond:
+                active.discard(i)
+                cond.notify_all()
+
+    threads = [threading.Thread(target=run, args=(i,), daemon=True)
+               for i in range(num_starts)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        with cond:
+            while True:
+                # wait until every remaining minimizer requires an evaluation
+                cond.wait_for(lambda: len(requests) == len(active))
+                if not active:
+                    break
+                ind = sorted(requests)
+                values, grads = fn(np.vstack([requests.pop(i) for i in ind]))
+                for j, i in enumerate(ind):
+                    responses[i] = (values[j], grads[j])
+                cond.notify_all()
+    except BaseException:
+        with cond:
+            failed.set()
+            cond.notify_all()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    return results
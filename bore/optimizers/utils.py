@@ -1,4 +1,7 @@
+import numpy as np
+
 from scipy.optimize import Bounds
+from sklearn.utils import check_random_state
 
 
 def from_bounds(bounds):
@@ -14,3 +17,59 @@ def from_bounds(bounds):
         dim = len(bounds)
 
     return (low, high), dim
+
+
+def boltzmann_sample(values, num_samples, eta=1., min_ratio=1e-4,
+                     random_state=None):
+    """
+    Select indices of candidates (without replacement) with probabilities
+    proportional to ``exp(eta * values / max(values))``, always including the
+    best candidate.
+
+    Only candidates with values at least ``min_ratio`` times the largest are
+    eligible, where the ratio is repeatedly relaxed by a factor of 10 until
+    there are enough of them. This presupposes the values are nonnegative
+    (e.g. probabilities); otherwise, all candidates are eligible and the
+    values are standardized instead.
+
+    Parameters
+    ----------
+    values : array of shape ``(N,)``
+        Values of the candidates, the larger the better.
+    num_samples : int
+        Number of candidates to select.
+
+    Returns
+    -------
+    ind : array of shape ``(num_samples,)``
+        Indices of the selected candidates.
+    """
+    random_state = check_random_state(random_state)
+
+    values = np.asarray(values, dtype="float64")
+    max_value = values.max()
+
+    if values.min() >= 0. and max_value > 0.:
+        ratio = min_ratio
+        eligible = np.flatnonzero(values >= ratio * max_value)
+        while len(eligible) < num_samples and ratio > 0.:
+            ratio /= 10.
+            eligible = np.flatnonzero(values >= ratio * max_value)
+        scores = values[eligible] / max_value
+    else:
+        eligible = np.arange(len(values))
+        std = values.std()
+        scores = (values - values.mean()) / (std if std > 0. else 1.)
+
+    logits = eta * scores
+    probs = np.exp(logits - logits.max())
+    probs /= probs.sum()
+
+    ind = random_state.choice(eligible, size=num_samples, replace=False,
+                              p=probs)
+
+    best = np.argmax(values)
+    if best not in ind:
+        ind[-1] = best
+
+    return ind
@@ -1,8 +1,8 @@
 import numpy as np
 import tensorflow as tf
-import tensorflow.keras.backend as K
 
-from tensorflow.keras.losses import BinaryCrossentropy
+from scipy.optimize import OptimizeResult
+from tensorflow.keras.metrics import binary_accuracy
 from tensorflow.keras.regularizers import l2
 
 from hpbandster.optimizers.hyperband import HyperBand
@@ -12,7 +12,7 @@ from .types import DenseConfigurationSpace, array_from_dict, dict_from_array
 from ...base import maybe_distort
 from ...math import steps_per_epoch
 from ...data import Record
-from ...models import MaximizableDenseSequential
+from ...models import MaximizableDenseSequential, reset_weights
 
 
 TRANSFORMS = dict(identity=tf.identity, sigmoid=tf.sigmoid, exp=tf.exp)
@@ -24,33 +24,38 @@ class BORE(HyperBand):
                  gamma=None, num_random_init=10, random_rate=0.1, retrain=False,
                  num_starts=5, num_samples=1024, batch_size=64,
                  num_steps_per_iter=1000, num_epochs_per_iter=None,
-                 optimizer="adam",
+                 warm_start_steps=None, optimizer="adam",
                  num_layers=2, num_units=32, activation="elu", l2_factor=None,
-                 transform="sigmoid", method="L-BFGS-B", max_iter=1000,
-                 ftol=1e-9, distortion=None, seed=None, **kwargs):
+                 dtype_policy=None, transform="sigmoid", method="L-BFGS-B",
+                 max_iter=1000, ftol=1e-9, distortion=None,
+                 reuse_maximum=False, seed=None, **kwargs):
 
         if gamma is None:
             gamma = 1/eta
 
-        cg = ClassifierConfigGenerator(config_space=config_space, gamma=gamma,
-                                       num_random_init=num_random_init,
-                                       random_rate=random_rate, retrain=retrain,
-                                       classifier_kws=dict(num_layers=num_layers,
-                                                           num_units=num_units,
-                                                           l2_factor=l2_factor,
-                                                           activation=activation,
-                                                           optimizer=optimizer),
-                                       fit_kws=dict(batch_size=batch_size,
-                                                    num_steps_per_iter=num_steps_per_iter,
-                                                    num_epochs_per_iter=num_epochs_per_iter),
-                                       optimizer_kws=dict(transform=transform,
-                                                          method=method,
-                                                          max_iter=max_iter,
-                                                          ftol=ftol,
-                                                          distortion=distortion,
-                                                          num_starts=num_starts,
-                                                          num_samples=num_samples),
-                                       seed=seed)
+        cg = ClassifierConfigGenerator(
+            config_space=config_space, gamma=gamma,
+            num_random_init=num_random_init, random_rate=random_rate,
+            retrain=retrain,
+            classifier_kws=dict(num_layers=num_layers,
+                                num_units=num_units,
+                                l2_factor=l2_factor,
+                                activation=activation,
+                                dtype_policy=dtype_policy,
+                                optimizer=optimizer),
+            fit_kws=dict(batch_size=batch_size,
+                         num_steps_per_iter=num_steps_per_iter,
+                         num_epochs_per_iter=num_epochs_per_iter,
+                         warm_start_steps=warm_start_steps),
+            optimizer_kws=dict(transform=transform,
+                               method=method,
+                               max_iter=max_iter,
+                               ftol=ftol,
+                               distortion=distortion,
+                               num_starts=num_starts,
+                               num_samples=num_samples,
+                               reuse_maximum=reuse_maximum),
+            seed=seed)
         # (LT): Note this is using the *grandparent* class initializer to
         # replace the config_generator!
         super(HyperBand, self).__init__(config_generator=cg, **kwargs)
@@ -109,6 +114,8 @@ class ClassifierConfigGenerator(base_config_generator):
         self.num_units = classifier_kws.get("num_units", 32)
         self.activation = classifier_kws.get("activation", "elu")
         self.optimizer = classifier_kws.get("optimizer", "adam")
+        # e.g. "mixed_bfloat16" to compute hidden layers in reduced precision
+        self.dtype_policy = classifier_kws.get("dtype_policy")
 
         l2_factor = classifier_kws.get("l2_factor")
 
@@ -117,11 +124,20 @@ class ClassifierConfigGenerator(base_config_generator):
 
         self.retrain = retrain
         self.logit = None
+        self._train_fn = None
+
+        # Training data, cached and rebuilt only when new observations have
+        # been recorded
+        self._train_data = None
+        self._train_data_size = -1
+        # Dataset size at the last classifier update
+        self._fit_size = -1
 
         # Options for fitting neural network parameters
         self.batch_size = fit_kws.get("batch_size", 64)
         self.num_steps_per_iter = fit_kws.get("num_steps_per_iter", 100)
         self.num_epochs_per_iter = fit_kws.get("num_epochs_per_iter")
+        self.warm_start_steps = fit_kws.get("warm_start_steps")
 
         # Options for maximizing the acquisition function
 
@@ -136,6 +152,11 @@ class ClassifierConfigGenerator(base_config_generator):
         self.ftol = optimizer_kws.get("ftol", 1e-9)
         self.max_iter = optimizer_kws.get("max_iter", 1000)
         self.distortion = optimizer_kws.get("distortion")
+        self.reuse_maximum = optimizer_kws.get("reuse_maximum", False)
+
+        # Last maximum found, along with the dataset size at the time
+        self._last_opt = None
+        self._last_opt_size = None
 
         self.record = Record()
 
@@ -144,23 +165,95 @@ class ClassifierConfigGenerator(base_config_generator):
 
     def _build_compile_network(self):
         self.logger.debug("Building and compiling network...")
-        network = MaximizableDenseSequential(transform=self.transform,
-                                             input_dim=self.input_dim,
-                                             output_dim=1,
-                                             num_layers=self.num_layers,
-                                             num_units=self.num_units,
-                                             layer_kws=dict(
-                                                activation=self.activation,
-                                                kernel_regularizer=self.kernel_regularizer,
-                                                bias_regularizer=self.bias_regularizer))
-        network.compile(optimizer=self.optimizer, metrics=["accuracy"],
-                        loss=BinaryCrossentropy(from_logits=True))
+        network = MaximizableDenseSequential(
+            transform=self.transform,
+            input_dim=self.input_dim,
+            output_dim=1,
+            num_layers=self.num_layers,
+            num_units=self.num_units,
+            layer_kws=dict(activation=self.activation,
+                           kernel_regularizer=self.kernel_regularizer,
+                           bias_regularizer=self.bias_regularizer,
+                           dtype=self.dtype_policy),
+            # output logits in full precision
+            final_layer_kws=dict(dtype="float32"))
+        # For numerical stability, we don't explicitly use an sigmoid output
+        # activation. Instead, we compute the loss directly from the logits.
+        network.compile(optimizer=self.optimizer)
         network.summary(print_fn=self.logger.debug)
         return network
 
+    def _build_train_fn(self):
+        # Rather than going through the full Keras training loop, we run the
+        # entire loop in graph mode, with the forward pass, loss, backward
+        # pass and optimizer update fused into a single XLA-compiled step.
+        network = self.logit
+        batch_size = self.batch_size
+        seed = self.seed
+
+        @tf.function(jit_compile=True)
+        def train_step(x, z, w):
+            with tf.GradientTape() as tape:
+                logits = network(x, training=True)
+                losses = tf.nn.sigmoid_cross_entropy_with_logits(labels=z,
+                                                                 logits=logits)
+                loss = tf.reduce_sum(w * losses) / tf.reduce_sum(w)
+                loss += sum(network.losses)  # regularization penalties
+            grads = tape.gradient(loss, network.trainable_variables)
+            network.optimizer.apply_gradients(zip(grads,
+                                                  network.trainable_variables))
+            return loss
+
+        @tf.function(input_signature=[
+            tf.TensorSpec(shape=(None, self.input_dim), dtype=tf.float32),
+            tf.TensorSpec(shape=(None, 1), dtype=tf.float32),
+            tf.TensorSpec(shape=(None, 1), dtype=tf.float32),
+            tf.TensorSpec(shape=(), dtype=tf.int32)])
+        def train_fn(X, z, w, num_epochs):
+            dataset_size = tf.shape(X)[0]
+            for epoch in tf.range(num_epochs):
+                ind = tf.random.shuffle(tf.range(dataset_size), seed=seed)
+                for start in tf.range(0, dataset_size, batch_size):
+                    ind_batch = ind[start:start + batch_size]
+                    # Pad the final (smaller) batch with zero-weighted
+                    # examples, so the training step always receives inputs
+                    # of the same shape and is only ever compiled once.
+                    size = tf.shape(ind_batch)[0]
+                    paddings = [[0, batch_size - size]]
+                    ind_batch = tf.pad(ind_batch, paddings)
+                    mask = tf.pad(tf.ones(size), paddings)
+                    train_step(tf.gather(X, ind_batch),
+                               tf.gather(z, ind_batch),
+                               tf.gather(w, ind_batch) *
+                               tf.expand_dims(mask, axis=-1))
+
+        return train_fn
+
+    def _evaluate_classifier(self, X, z):
+        logits = self.logit(X)
+        losses = tf.nn.sigmoid_cross_entropy_with_logits(labels=z,
+                                                         logits=logits)
+        loss = tf.reduce_mean(losses) + sum(self.logit.losses)
+        accuracy = tf.reduce_mean(binary_accuracy(z, logits, threshold=0.))
+        return loss.numpy(), accuracy.numpy()
+
+    def _load_train_data(self):
+
+        dataset_size = self.record.size()
+
+        if dataset_size != self._train_data_size:
+            self.logger.debug("Loading training data...")
+            X, z = self.record.load_classification_data(self.gamma)
+            self._train_data = (tf.constant(X, dtype=tf.float32),
+                                tf.constant(np.expand_dims(z, axis=-1),
+                                            dtype=tf.float32))
+            self._train_data_size = dataset_size
+
+        return self._train_data
+
     def _update_classifier(self):
 
-        X, z = self.record.load_classification_data(self.gamma)
+        X, z = self._load_train_data()
 
         dataset_size = self.record.size()
         num_steps = steps_per_epoch(dataset_size, self.batch_size)
@@ -175,15 +268,26 @@ class ClassifierConfigGenerator(base_config_generator):
                               f"(num_epochs_per_iter={num_epochs_per_iter}). "
                               f"Ignoring num_steps_per_iter={self.num_steps_per_iter}")
 
-        callbacks = []
-        # TODO(LT): Add option
-        # early_stopping = EarlyStopping(monitor="loss", min_delta=1e-3,
-        #                                verbose=True, patience=5, mode="min")
-        # callbacks.append(early_stopping)
-
-        self.logit.fit(X, z, epochs=num_epochs_per_iter, batch_size=self.batch_size,
-                       callbacks=callbacks, verbose=False)  # TODO(LT): Make this an argument
-        loss, accuracy = self.logit.evaluate(X, z, verbose=False)
+        w = tf.ones_like(z)
+
+        # Since the classifier is persisted across iterations, if only a
+        # single observation was added since it was last updated, a few
+        # gradient steps suffice to absorb it.
+        if self.warm_start_steps is not None and not self.retrain and \
+                dataset_size == self._fit_size + 1:
+            num_epochs_per_iter = max(1, self.warm_start_steps // num_steps)
+            # Upweight the new observation (the most recently recorded) to
+            # make up for the fewer number of gradient steps.
+            weight = max(1., self.num_steps_per_iter / self.warm_start_steps)
+            w = tf.concat([w[:-1], tf.fill((1, 1), weight)], axis=0)
+            self.logger.debug("Warm-starting from previous classifier. "
+                              "Setting num_epochs_per_iter="
+                              f"{num_epochs_per_iter} "
+                              f"(new observation weight: {weight:.1f})")
+
+        self._train_fn(X, z, w, num_epochs_per_iter)
+        self._fit_size = dataset_size
+        loss, accuracy = self._evaluate_classifier(X, z)
 
         self.logger.info(f"[Model fit: loss={loss:.3f}, "
                          f"accuracy={accuracy:.3f}] "
@@ -197,15 +301,15 @@ class ClassifierConfigGenerator(base_config_generator):
         # Build neural network probabilistic classifier
         if self.logit is None:
             self.logit = self._build_compile_network()
+            self._train_fn = self._build_train_fn()
 
-    def _maybe_delete_classifier(self):
+    def _maybe_reset_classifier(self):
         if self.retrain:
             # if we are not persisting model across optimization iterations
-            # delete and clear from memory
-            self.logger.debug("Deleting model...")
-            K.clear_session()
-            del self.logit
-            self.logit = None  # reset
+            # re-initialize its weights, but keep the model (and its compiled
+            # training function) around for reuse
+            self.logger.debug("Resetting model...")
+            reset_weights(self.logit)
 
     def _is_unique(self, res):
         is_duplicate = self.record.is_duplicate(res.x)
@@ -213,6 +317,32 @@ class ClassifierConfigGenerator(base_config_generator):
             self.logger.warn("Duplicate detected! Skipping...")
         return not is_duplicate
 
+    def _maybe_reuse_maximum(self, dataset_size):
+        # If only a single observation has been recorded since the last
+        # maximum was found, and the updated classifier still prefers that
+        # maximum over the new observation, then reuse it rather than
+        # running the full multi-start maximization again.
+        if not self.reuse_maximum or self._last_opt is None or \
+                dataset_size != self._last_opt_size + 1:
+            return None
+
+        x_new = self.record.load_feature_matrix()[-1]
+        z_last, z_new = self.logit(np.vstack((self._last_opt.x, x_new)),
+                                   training=False).numpy().squeeze(axis=-1)
+
+        if z_last > z_new and self._is_unique(self._last_opt):
+            self.logger.debug("Reusing previous maximum "
+                              f"(logit={z_last:.3f} > {z_new:.3f})...")
+            # value under the updated classifier, rather than that under the
+            # classifier with which the maximum was found, in the same terms
+            # as the function minimized by `argmax`, i.e. the transformed
+            # negated output
+            opt = OptimizeResult(self._last_opt)
+            opt.fun = float(self.transform(-z_last))
+            return opt
+
+        return None
+
     def get_config(self, budget):
 
         dataset_size = self.record.size()
@@ -234,24 +364,27 @@ class ClassifierConfigGenerator(base_config_generator):
                               " initial runs. Suggesting random candidate...")
             return (config_random_dict, {})
 
-        # Create classifier (if retraining from scratch every iteration)
+        # Create classifier (if it has not been created yet)
         self._maybe_create_classifier()
 
         # Train classifier
         self._update_classifier()
 
         # Maximize classifier wrt input
-        self.logger.debug("Beginning multi-start maximization with "
-                          f"{self.num_starts} starts...")
-        opt = self.logit.argmax(self.bounds,
-                                num_starts=self.num_starts,
-                                num_samples=self.num_samples,
-                                method=self.method,
-                                options=dict(maxiter=self.max_iter,
-                                             ftol=self.ftol),
-                                print_fn=self.logger.debug,
-                                filter_fn=self._is_unique,
-                                random_state=self.random_state)
+        opt = self._maybe_reuse_maximum(dataset_size)
+        if opt is None:
+            self.logger.debug("Beginning multi-start maximization with "
+                              f"{self.num_starts} starts...")
+            opt = self.logit.argmax(self.bounds,
+                                    num_starts=self.num_starts,
+                                    num_samples=self.num_samples,
+                                    method=self.method,
+                                    options=dict(maxiter=self.max_iter,
+                                                 ftol=self.ftol),
+                                    batch=True,
+                                    print_fn=self.logger.debug,
+                                    filter_fn=self._is_unique,
+                                    random_state=self.random_state)
         if opt is None:
             # TODO(LT): It's actually important to report which of these
             # failures occurred...
@@ -261,6 +394,9 @@ class ClassifierConfigGenerator(base_config_generator):
                              " Suggesting random candidate...")
             return (config_random_dict, {})
 
+        self._last_opt = opt
+        self._last_opt_size = dataset_size
+
         loc = opt.x
         self.logger.info(f"[Glob. maximum: value={-opt.fun:.3f} x={loc}]")
         config_opt_arr = maybe_distort(loc, self.distortion,
@@ -268,8 +404,8 @@ class ClassifierConfigGenerator(base_config_generator):
                                        print_fn=self.logger.info)
         config_opt_dict = dict_from_array(self.config_space, config_opt_arr)
 
-        # Delete classifier (if retraining from scratch every iteration)
-        self._maybe_delete_classifier()
+        # Reset classifier (if retraining from scratch every iteration)
+        self._maybe_reset_classifier()
 
         return (config_opt_dict, {})
 
@@ -1,8 +1,12 @@
+import logging
 import numpy as np
-# import tensorflow as tf
+import tensorflow as tf
 import tensorflow.keras.backend as K
 
-from tensorflow.keras.losses import BinaryCrossentropy
+from contextlib import nullcontext
+from scipy.stats import qmc
+
+from tensorflow.keras.metrics import binary_accuracy
 from tensorflow.keras.regularizers import l2
 
 from hpbandster.optimizers.hyperband import HyperBand
@@ -15,17 +19,41 @@ from ...math import steps_per_epoch
 from ...data import MultiFidelityRecord
 from ...models import StackedRecurrentFactory
 
+try:  # dependency of scikit-learn
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+
+def _single_threaded_blas():
+    """
+    Limit BLAS to a single thread within a ``with`` block.
+
+    The linear algebra of the L-BFGS-B iterations on a handful of variables
+    is far too small to benefit from multiple threads, and the overhead of
+    synchronizing them can dominate (notably with OpenBLAS). Since the BLAS
+    library is already loaded, setting ``OPENBLAS_NUM_THREADS`` at this point
+    would have no effect; the limit is instead set at runtime, and restored
+    on exit.
+    """
+    if threadpool_limits is None:
+        return nullcontext()
+    return threadpool_limits(limits=1, user_api="blas")
+
 
 class BOREHyperband(HyperBand):
 
     def __init__(self, config_space, eta=3, min_budget=0.01, max_budget=1,
                  gamma=None, num_random_init=10, random_rate=0.1, retrain=False,
-                 num_starts=5, num_samples=1024, batch_size=64,
+                 num_starts=5, num_samples=256, init_strategy="boltzmann",
+                 batch_size=64,
                  num_steps_per_iter=1000, num_epochs=None, optimizer="adam",
                  mask_value=-1.,
                  num_layers=2, num_units=32, activation="elu", l2_factor=None,
-                 transform="sigmoid", method="L-BFGS-B", max_iter=1000,
-                 ftol=1e-9, distortion=None, seed=None, **kwargs):
+                 dtype_policy=None, transform="sigmoid", method="L-BFGS-B",
+                 max_iter=1000, ftol=1e-7, gtol=1e-9, maxcor=70, maxls=20,
+                 distortion=None,
+                 lockstep=False, recycle_session=False, seed=None, **kwargs):
 
         if gamma is None:
             gamma = 1/eta
@@ -40,6 +68,7 @@ class BOREHyperband(HyperBand):
                                                 num_units=num_units,
                                                 l2_factor=l2_factor,
                                                 activation=activation,
+                                                dtype_policy=dtype_policy,
                                                 optimizer=optimizer,
                                                 mask_value=mask_value),
                                                fit_kws=dict(
@@ -51,14 +80,23 @@ class BOREHyperband(HyperBand):
                                                 method=method,
                                                 max_iter=max_iter,
                                                 ftol=ftol,
+                                                gtol=gtol,
+                                                maxcor=maxcor,
+                                                maxls=maxls,
                                                 distortion=distortion,
+                                                lockstep=lockstep,
                                                 num_starts=num_starts,
-                                                num_samples=num_samples),
+                                                num_samples=num_samples,
+                                                init_strategy=init_strategy),
                                                seed=seed)
         # (LT): Note this is using the *grandparent* class initializer to
         # replace the config_generator!
         super(HyperBand, self).__init__(config_generator=cg, **kwargs)
 
+        # whether to rebuild the classifier in a fresh Keras session between
+        # brackets, to release the memory held by graphs traced in the last
+        self.recycle_session = recycle_session
+
         # (LT): the design of HpBandSter framework requires us to copy-paste
         # the following boilerplate code (cannot really just subclass and
         # specify an alternative Configuration Generator).
@@ -80,13 +118,31 @@ class BOREHyperband(HyperBand):
             'max_SH_iter': self.max_SH_iter,
             'gamma': gamma,
             'num_random_init': num_random_init,
+            'init_strategy': init_strategy,
+            'method': method,
+            'max_iter': max_iter,
+            'ftol': ftol,
+            'gtol': gtol,
+            'maxcor': maxcor,
+            'maxls': maxls,
+            'recycle_session': recycle_session,
             'seed': seed
         }
         self.config.update(conf)
 
+    def get_next_iteration(self, iteration, iteration_kwargs={}):
+        # Called with the master's lock held, so no results are registered
+        # and no configurations are suggested while the session is recycled.
+        if self.recycle_session and iteration > 0:
+            self.config_generator._recycle_session()
+        return super(BOREHyperband, self).get_next_iteration(
+            iteration, iteration_kwargs=iteration_kwargs)
+
 
 class SequenceClassifierConfigGenerator(base_config_generator):
 
+    num_random_mode_draws = 8192
+
     def __init__(self, config_space, gamma, num_random_init, random_rate,
                  retrain, classifier_kws, fit_kws, optimizer_kws, seed, **kwargs):
 
@@ -110,6 +166,8 @@ class SequenceClassifierConfigGenerator(base_config_generator):
         self.bounds = self.config_space.get_bounds()
 
         self.optimizer = classifier_kws.get("optimizer", "adam")
+        # e.g. "mixed_float16" to compute recurrent layers in reduced precision
+        self.dtype_policy = classifier_kws.get("dtype_policy")
         self.mask_value = classifier_kws.get("mask_value", 1e-9)
 
         num_layers = classifier_kws.get("num_layers", 2)
@@ -121,7 +179,7 @@ class SequenceClassifierConfigGenerator(base_config_generator):
         kernel_regularizer = None if l2_factor is None else l2(l2_factor)
         bias_regularizer = None if l2_factor is None else l2(l2_factor)
 
-        self.model_factory = StackedRecurrentFactory(
+        self._model_factory_kws = dict(
             input_dim=self.input_dim,
             output_dim=1,
             num_layers=num_layers,
@@ -129,22 +187,36 @@ class SequenceClassifierConfigGenerator(base_config_generator):
             layer_kws=dict(
                 activation=activation,
                 kernel_regularizer=kernel_regularizer,
-                bias_regularizer=bias_regularizer
-            )
+                bias_regularizer=bias_regularizer,
+                dtype=self.dtype_policy
+            ),
+            # output logits in full precision
+            final_layer_kws=dict(dtype="float32")
         )
+        self.model_factory = StackedRecurrentFactory(**self._model_factory_kws)
 
         if retrain:
             raise NotImplementedError
         self.retrain = retrain
 
-        self.logit = self._build_compile_network()
-        self.funcs = {}
-
         # Options for fitting neural network parameters
         self.batch_size = fit_kws.get("batch_size", 64)
         self.num_steps_per_iter = fit_kws.get("num_steps_per_iter", 100)
         self.num_epochs = fit_kws.get("num_epochs")
 
+        self.seed = seed
+
+        self.logit = self._build_compile_network()
+        # Training functions, keyed by the length of the sequences, i.e. the
+        # number of rungs, which must be static for the recurrent layers to
+        # be compiled with XLA (at least in Keras 3).
+        self._train_fns = {}
+        # One-to-one networks for maximizing the acquisition function, keyed
+        # by rung. These share their layers (and hence weights) with the
+        # network above, so each one only holds on to its own (compiled)
+        # functions, and there are at most as many as there are rungs.
+        self.funcs = {}
+
         # Options for maximizing the acquisition function
 
         transform_name = optimizer_kws.get("transform", "sigmoid")
@@ -154,25 +226,165 @@ class SequenceClassifierConfigGenerator(base_config_generator):
 
         assert optimizer_kws.get("num_starts") > 0
         self.num_starts = optimizer_kws.get("num_starts", 5)
-        self.num_samples = optimizer_kws.get("num_samples", 1024)
+        num_samples = optimizer_kws.get("num_samples", 256)
+        assert num_samples > 0, "`num_samples` must be positive integer!"
+        # Sobol' points (see below) are only balanced in batches whose size is
+        # a power of two, so round up to the nearest one
+        self.num_samples = 1 << (num_samples - 1).bit_length()
+        if self.num_samples != num_samples:
+            self.logger.info(f"Rounded up num_samples={num_samples} to "
+                             f"{self.num_samples} (a power of two)")
+        self.init_strategy = optimizer_kws.get("init_strategy", "boltzmann")
         self.method = optimizer_kws.get("method", "L-BFGS-B")
-        self.ftol = optimizer_kws.get("ftol", 1e-9)
+        # the limited-memory variant has per-iteration cost linear, rather
+        # than quadratic, in the input dimension
+        assert self.method.upper() != "BFGS", \
+            "`method` must not be 'BFGS'; use 'L-BFGS-B' instead"
+        self.ftol = optimizer_kws.get("ftol", 1e-7)
+        self.gtol = optimizer_kws.get("gtol", 1e-9)
+        self.maxcor = optimizer_kws.get("maxcor", 70)
+        self.maxls = optimizer_kws.get("maxls", 20)
         self.max_iter = optimizer_kws.get("max_iter", 1000)
         self.distortion = optimizer_kws.get("distortion")
+        # Whether to run a separate minimizer for each start (in lockstep),
+        # rather than a single minimizer on the batch of starts. Since the
+        # network is cheap to evaluate, the cost of handing off between the
+        # threads of the minimizers usually outweighs the savings.
+        self.lockstep = optimizer_kws.get("lockstep", False)
 
         self.record = MultiFidelityRecord(gamma=gamma)
+        # Padded sequences from the last update, along with the numbers of
+        # inputs and observations per rung from which they were assembled
+        self._train_data = None
+        self._train_data_key = None
+        # Key of the training data at the last classifier update
+        self._fit_key = None
 
-        self.seed = seed
         self.random_state = np.random.RandomState(seed)
+        # Buffer of coin flips for epsilon-greedy exploration
+        self._random_mode_draws = iter(())
+        # Candidate starting points for maximizing the acquisition function
+        # are drawn from a scrambled Sobol' sequence, which covers the input
+        # space more evenly than uniform random sampling, and so requires
+        # fewer of them.
+        self.sobol = qmc.Sobol(d=self.input_dim, scramble=True, seed=seed)
 
     def _build_compile_network(self):
         self.logger.debug("Building and compiling network...")
         network = self.model_factory.build_many_to_many(mask_value=self.mask_value)
-        network.compile(optimizer=self.optimizer, metrics=["accuracy"],
-                        loss=BinaryCrossentropy(from_logits=True))
+        optimizer = tf.keras.optimizers.get(self.optimizer)
+        if self.dtype_policy == "mixed_float16":
+            # gradients computed in half precision may underflow unless the
+            # loss is scaled up beforehand (unlike with "mixed_bfloat16")
+            optimizer = tf.keras.mixed_precision.LossScaleOptimizer(optimizer)
+        # For numerical stability, we don't explicitly use an sigmoid output
+        # activation. Instead, we compute the loss directly from the logits.
+        network.compile(optimizer=optimizer)
         network.summary(print_fn=self.logger.debug)
         return network
 
+    def _sequence_mask(self, inputs):
+        # Same mask as computed by the network's masking layer, i.e. the
+        # timesteps at which the inputs are not padded. The loss is averaged
+        # over these timesteps only.
+        mask = tf.reduce_any(tf.not_equal(inputs, self.mask_value), axis=-1)
+        return tf.cast(tf.expand_dims(mask, axis=-1), dtype=tf.float32)
+
+    def _build_train_fn(self, num_steps):
+        # Rather than going through the full Keras training loop, we run the
+        # entire loop in graph mode, with the forward pass, loss, backward
+        # pass and optimizer update fused into a single XLA-compiled step.
+        network = self.logit
+        batch_size = self.batch_size
+        seed = self.seed
+        sequence_mask = self._sequence_mask
+        loss_scale = isinstance(network.optimizer,
+                                tf.keras.mixed_precision.LossScaleOptimizer)
+        # In Keras 3, the loss is scaled through `scale_loss`, and the
+        # gradients are unscaled by the optimizer itself when applied.
+        unscale_grads = loss_scale and \
+            hasattr(network.optimizer, "get_unscaled_gradients")
+
+        @tf.function(jit_compile=True)
+        def train_step(x, z, w):
+            with tf.GradientTape() as tape:
+                logits = network(x, training=True)
+                losses = tf.nn.sigmoid_cross_entropy_with_logits(labels=z,
+                                                                 logits=logits)
+                w *= sequence_mask(x)
+                loss = tf.reduce_sum(w * losses) / tf.reduce_sum(w)
+                loss += sum(network.losses)  # regularization penalties
+                if unscale_grads:
+                    scaled_loss = network.optimizer.get_scaled_loss(loss)
+                elif loss_scale:
+                    scaled_loss = network.optimizer.scale_loss(loss)
+                else:
+                    scaled_loss = loss
+            grads = tape.gradient(scaled_loss, network.trainable_variables)
+            if unscale_grads:
+                grads = network.optimizer.get_unscaled_gradients(grads)
+            network.optimizer.apply_gradients(zip(grads,
+                                                  network.trainable_variables))
+            return loss
+
+        @tf.function(input_signature=[
+            tf.TensorSpec(shape=(None, num_steps, self.input_dim),
+                          dtype=tf.float32),
+            tf.TensorSpec(shape=(None, num_steps, 1), dtype=tf.float32),
+            tf.TensorSpec(shape=(), dtype=tf.int32)])
+        def train_fn(inputs, targets, num_epochs):
+            dataset_size = tf.shape(inputs)[0]
+            for epoch in tf.range(num_epochs):
+                ind = tf.random.shuffle(tf.range(dataset_size), seed=seed)
+                for start in tf.range(0, dataset_size, batch_size):
+                    ind_batch = ind[start:start + batch_size]
+                    # Pad the final (smaller) batch with zero-weighted
+                    # sequences, so the training step always receives inputs
+                    # of the same shape and is only compiled once.
+                    size = tf.shape(ind_batch)[0]
+                    paddings = [[0, batch_size - size]]
+                    ind_batch = tf.pad(ind_batch, paddings)
+                    mask = tf.pad(tf.ones(size), paddings)
+                    train_step(tf.gather(inputs, ind_batch),
+                               tf.gather(targets, ind_batch),
+                               tf.reshape(mask, shape=(-1, 1, 1)))
+
+        return train_fn
+
+    def _recycle_session(self):
+        """
+        Rebuild the classifier in a fresh Keras session, carrying over its
+        weights, so that the graphs traced for the networks and functions
+        discarded along with the old session can be freed.
+
+        Note that ``K.clear_session`` resets the *global* state, and so
+        affects any other models built in the same process. The state of the
+        optimizer (e.g. moment estimates) is not carried over.
+        """
+        self.logger.debug("Recycling Keras session...")
+        weights = self.logit.get_weights()
+
+        self.funcs.clear()
+        self._train_fns.clear()
+        del self.logit, self.model_factory
+        K.clear_session()
+
+        self.model_factory = StackedRecurrentFactory(**self._model_factory_kws)
+        self.logit = self._build_compile_network()
+        self.logit.set_weights(weights)
+
+    def _evaluate_classifier(self, inputs, targets):
+        logits = self.logit(inputs)
+        mask = self._sequence_mask(inputs)
+        losses = tf.nn.sigmoid_cross_entropy_with_logits(labels=targets,
+                                                         logits=logits)
+        loss = tf.reduce_sum(mask * losses) / tf.reduce_sum(mask)
+        loss += sum(self.logit.losses)
+        accuracy = binary_accuracy(targets, logits, threshold=0.)
+        accuracy = tf.reduce_sum(tf.squeeze(mask, axis=-1) * accuracy) / \
+            tf.reduce_sum(mask)
+        return loss.numpy(), accuracy.numpy()
+
     # def _maybe_create_classifier(self):
     #     # Build neural network probabilistic classifier
     #     if self.logit is None:
@@ -195,35 +407,70 @@ class SequenceClassifierConfigGenerator(base_config_generator):
     #         del self.logit
     #         self.logit = None  # reset
 
-    def _update_classifier(self):
+    def _load_train_data(self):
+
+        # Several configurations are often suggested before any new results
+        # are recorded, in which case the sequences remain unchanged
+        key = (self.record.num_features(), tuple(self.record.rung_sizes()))
 
-        inputs, targets = self.record.sequences(binary=True, pad_value=self.mask_value)
-        self.logger.debug(f"Input sequence shape: {inputs.shape}")
-        self.logger.debug(f"Target sequence shape: {targets.shape}")
+        if key != self._train_data_key:
+            self.logger.debug("Loading training data...")
+            inputs, targets = self.record.sequences(binary=True,
+                                                    pad_value=self.mask_value,
+                                                    dtype="float32")
+            # Converted to tensors once here, rather than copied over on
+            # every call to the training (and evaluation) function
+            self._train_data = (tf.constant(inputs), tf.constant(targets))
+            self._train_data_key = key
 
-        dataset_size = self.record.num_features()
-        num_steps = steps_per_epoch(dataset_size, self.batch_size)
+        return self._train_data
+
+    def _update_classifier(self):
+
+        # Avoid formatting messages that are not going to be logged anyway
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+
+        inputs, targets = self._load_train_data()
+        # No results have been recorded since the classifier was last fit,
+        # e.g. since several configurations are suggested before any of them
+        # are evaluated, so there is nothing new to learn from
+        if self._train_data_key == self._fit_key:
+            self.logger.debug("No new observations since last model fit. "
+                              "Skipping...")
+            return
+        if debug:
+            self.logger.debug(f"Input sequence shape: {inputs.shape}")
+            self.logger.debug(f"Target sequence shape: {targets.shape}")
 
         num_epochs = self.num_epochs
         if num_epochs is None:
+            # number of sequences, i.e. the leading dimension of the inputs
+            dataset_size = len(inputs)
+            num_steps = steps_per_epoch(dataset_size, self.batch_size)
             num_epochs = self.num_steps_per_iter // num_steps
-            self.logger.debug("Argument `num_epochs` has not been specified. "
-                              f"Setting num_epochs={num_epochs}")
-        else:
+            if debug:
+                self.logger.debug("Argument `num_epochs` has not been "
+                                  "specified. Setting "
+                                  f"num_epochs={num_epochs}")
+        elif debug:
             self.logger.debug("Argument `num_epochs` is specified "
                               f"(num_epochs={num_epochs}). "
                               f"Ignoring num_steps_per_iter={self.num_steps_per_iter}")
 
-        callbacks = []
-        # TODO(LT): Add option
-        # early_stopping = EarlyStopping(monitor="loss", min_delta=1e-3,
-        #                                verbose=True, patience=5, mode="min")
-        # callbacks.append(early_stopping)
+        num_rungs = inputs.shape[1]
+        train_fn = self._train_fns.get(num_rungs)
+        if train_fn is None:
+            train_fn = self._train_fns[num_rungs] = \
+                self._build_train_fn(num_rungs)
+        train_fn(inputs, targets, num_epochs)
+        self._fit_key = self._train_data_key
+
+        # The fitted classifier is only evaluated on the training data for
+        # the purposes of logging, which costs an additional forward pass
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
 
-        self.logit.fit(inputs, targets, epochs=num_epochs,
-                       batch_size=self.batch_size, callbacks=callbacks,
-                       verbose=False)
-        loss, accuracy = self.logit.evaluate(inputs, targets, verbose=False)
+        loss, accuracy = self._evaluate_classifier(inputs, targets)
 
         self.logger.info(f"[Model fit: loss={loss:.3f}, "
                          f"accuracy={accuracy:.3f}] "
@@ -233,24 +480,41 @@ class SequenceClassifierConfigGenerator(base_config_generator):
                          f"num steps per iter: {self.num_steps_per_iter}, "
                          f"num epochs: {num_epochs}")
 
+    def _sample_candidates(self):
+        # The dense encoding of the configuration space already lies in the
+        # unit hypercube, which is precisely the domain of the sequence, so no
+        # rescaling is necessary
+        return self.sobol.random(self.num_samples)
+
     def _is_unique(self, res):
         is_duplicate = self.record.is_duplicate(res.x)
         if is_duplicate:
             self.logger.warn("Duplicate detected! Skipping...")
         return not is_duplicate
 
-    def get_config(self, budget):
+    def _draw_random_mode(self):
+        # Coin flips for epsilon-greedy exploration are drawn in bulk and
+        # handed out one at a time, rather than drawn individually
+        try:
+            return next(self._random_mode_draws)
+        except StopIteration:
+            draws = self.random_state.binomial(n=1, p=self.random_rate,
+                                               size=self.num_random_mode_draws)
+            self._random_mode_draws = iter(draws.astype(bool).tolist())
+            return next(self._random_mode_draws)
+
+    def _sample_random_config(self):
+        # Only sampled when actually suggested
+        return self.config_space.sample_configuration().get_dictionary()
 
-        config_random = self.config_space.sample_configuration()
-        config_random_dict = config_random.get_dictionary()
+    def get_config(self, budget):
 
         # epsilon-greedy exploration
-        if self.random_rate is not None and \
-                self.random_state.binomial(p=self.random_rate, n=1):
+        if self.random_rate is not None and self._draw_random_mode():
             self.logger.info("[Glob. maximum: skipped "
                              f"(prob={self.random_rate:.2f})] "
                              "Suggesting random candidate ...")
-            return (config_random_dict, {})
+            return (self._sample_random_config(), {})
 
         # TODO(LT): Should just skip based on number of unique input features
         # observed so far.
@@ -260,7 +524,7 @@ class SequenceClassifierConfigGenerator(base_config_generator):
             self.logger.debug("There are no rungs with at least "
                               f"{self.num_random_init} observations. "
                               "Suggesting random candidate...")
-            return (config_random_dict, {})
+            return (self._sample_random_config(), {})
 
         self.logger.debug(f"Rung {t} is the highest with at least "
                           f"{self.num_random_init} observations.")
@@ -272,22 +536,38 @@ class SequenceClassifierConfigGenerator(base_config_generator):
         self._update_classifier()
 
         # Classifier specific to a rung. These are built on-the-fly and then
-        # cached for use in subsquent iterations.
-        num_steps = t + 1  # rungs are zero-based
-        func = self.funcs.setdefault(t, self.model_factory.build_one_to_one(num_steps, transform=self.transform))
+        # cached for use in subsquent iterations. Since they share their
+        # layers with the network being trained, their compiled acquisition
+        # functions (traced once for inputs of any batch size) remain valid
+        # across iterations. Note the network must only be built on a cache
+        # miss, which rules out `setdefault`.
+        func = self.funcs.get(t)
+        if func is None:
+            num_steps = t + 1  # rungs are zero-based
+            func = self.model_factory.build_one_to_one(
+                num_steps, transform=self.transform)
+            self.funcs[t] = func
 
         # Maximize classifier wrt input
         self.logger.debug("Beginning multi-start maximization with "
                           f"{self.num_starts} starts...")
-        opt = func.argmax(self.bounds,
-                          num_starts=self.num_starts,
-                          num_samples=self.num_samples,
-                          method=self.method,
-                          options=dict(maxiter=self.max_iter,
-                                       ftol=self.ftol),
-                          print_fn=self.logger.debug,
-                          filter_fn=self._is_unique,
-                          random_state=self.random_state)
+        options = dict(maxiter=self.max_iter, ftol=self.ftol)
+        if self.method.lower() == "l-bfgs-b":
+            # options specific to L-BFGS-B, which other methods don't accept
+            options.update(gtol=self.gtol, maxcor=self.maxcor,
+                           maxls=self.maxls)
+        with _single_threaded_blas():
+            opt = func.argmax(self.bounds,
+                              num_starts=self.num_starts,
+                              candidates=self._sample_candidates(),
+                              init_strategy=self.init_strategy,
+                              method=self.method,
+                              options=options,
+                              batch=not self.lockstep,
+                              lockstep=self.lockstep,
+                              print_fn=self.logger.debug,
+                              filter_fn=self._is_unique,
+                              random_state=self.random_state)
 
         if opt is None:
             # TODO(LT): It's actually important to report which of these
@@ -296,7 +576,7 @@ class SequenceClassifierConfigGenerator(base_config_generator):
                              f"failed in all {self.num_starts} starts, or "
                              "all maxima found have been evaluated previously!"
                              " Suggesting random candidate...")
-            return (config_random_dict, {})
+            return (self._sample_random_config(), {})
 
         loc = opt.x
         self.logger.info(f"[Glob. maximum: value={-opt.fun:.3f} x={loc}]")
@@ -323,7 +603,10 @@ class SequenceClassifierConfigGenerator(base_config_generator):
 
         self.record.append(x=config_arr, y=loss, b=budget)
 
-        self.logger.debug(f"[Data] rungs: {self.record.num_rungs()}, "
-                          f"budgets: {self.record.budgets()}, "
-                          f"rung sizes: {self.record.rung_sizes()}")
-        self.logger.debug(f"[Data] thresholds: {self.record.thresholds()}")
+        # Computing the thresholds involves a quantile for each rung, which
+        # is wasted unless it is actually logged
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"[Data] rungs: {self.record.num_rungs()}, "
+                              f"budgets: {self.record.budgets()}, "
+                              f"rung sizes: {self.record.rung_sizes()}")
+            self.logger.debug(f"[Data] thresholds: {self.record.thresholds()}")
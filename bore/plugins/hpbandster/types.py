@@ -4,14 +4,45 @@ import ConfigSpace as CS
 from scipy.optimize import Bounds
 
 
-def array_from_dict(config_space, dct):
-    config = DenseConfiguration(config_space, values=dct)
-    return config.to_array()
+def array_from_dict(config_space, dct, dtype="float64"):
+    """
+    Equivalent to ``DenseConfiguration(config_space, values=dct).to_array()``,
+    but writes each value directly into its slot(s) of the dense array
+    without constructing (and validating) an intermediate configuration.
+    """
+    array_dense = np.zeros(config_space.size_dense, dtype=dtype)
+
+    for hp, trg_ind in config_space.num_slots:
+        array_dense[trg_ind] = hp._inverse_transform(dct[hp.name])
+
+    if config_space.cat_slots:
+        array_dense[[trg_ind + index[dct[hp.name]]
+                     for hp, trg_ind, index in config_space.cat_slots]] = 1
+
+    return array_dense
 
 
 def dict_from_array(config_space, array):
-    config = DenseConfiguration.from_array(config_space, array_dense=array)
-    return config.get_dictionary()
+    """
+    Equivalent to ``DenseConfiguration.from_array(config_space,
+    array_dense=array).get_dictionary()``, but reads each value directly from
+    its slot(s) of the dense array.
+    """
+    dct = {}
+
+    for hp, trg_ind in config_space.num_slots:
+        dct[hp.name] = hp._transform(array[trg_ind])
+
+    if config_space.cat_slots:
+        # gather the one-hot blocks of all categorical hyperparameters into
+        # the rows of a matrix (padded with `-inf`), and take the argmax of
+        # each row at once
+        blocks = np.append(array, -np.inf)[config_space.cat_blocks]
+        for (hp, _, _), ind in zip(config_space.cat_slots,
+                                   blocks.argmax(axis=1)):
+            dct[hp.name] = hp.choices[ind]
+
+    return dct
 
 
 class DenseConfigurationSpace(CS.ConfigurationSpace):
@@ -34,6 +65,25 @@ class DenseConfigurationSpace(CS.ConfigurationSpace):
 
         self.nums = nums
         self.cats = cats
+
+        # hyperparameters alongside their slot(s) in the dense array, for
+        # direct conversion to and from dictionaries
+        hps = self.get_hyperparameters()
+        self.num_slots = [(hps[src_ind], trg_ind) for src_ind, trg_ind in nums]
+        # categorical ones alongside the index of each choice in their block
+        # (of its first occurrence, as with `list.index`)
+        self.cat_slots = [(hps[src_ind], trg_ind,
+                           {choice: i for i, choice in
+                            reversed(list(enumerate(hps[src_ind].choices)))})
+                          for src_ind, trg_ind, size in cats]
+        # indices of the one-hot block of each categorical hyperparameter in
+        # the rows of a matrix, padded with an index one past the end of the
+        # dense array
+        self.cat_blocks = np.full((len(cats), max((size for *_, size in cats),
+                                                  default=0)),
+                                  size_dense, dtype=np.intp)
+        for k, (_, trg_ind, size) in enumerate(cats):
+            self.cat_blocks[k, :size] = np.arange(trg_ind, trg_ind + size)
         self.size_sparse = size_sparse
         self.size_dense = size_dense
 
@@ -54,6 +104,9 @@ class DenseConfigurationSpace(CS.ConfigurationSpace):
         return configs if size > 1 else configs.pop()
 
     def get_bounds(self):
+        # All hyperparameters are encoded in the unit interval (numerical ones
+        # through their `_inverse_transform`, categorical ones one-hot), so
+        # the acquisition function is always optimized in the unit hypercube
         lowers = np.zeros(self.size_dense)
         uppers = np.ones(self.size_dense)
 
@@ -39,6 +39,7 @@ setup(
     description="Bayesian Optimization by Density-Ratio Estimation",
     install_requires=requirements,
     extras_require={"hpbandster": ["hpbandster==0.7.4"],
+                    "numba": ["numba"],
                     "tf": ["tensorflow==2.5.0"],
                     "tf-gpu": ["tensorflow-gpu==2.5.0"]},
     license="MIT license",
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+
+"""Tests for `bore` package."""
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from scipy.stats import kstest
+from bore.base import (convert, convert_batch, convert_dense, is_dense,
+                       convert_recurrent, is_recurrent, truncated_normal,
+                       sample_truncated_normal)
+from bore.models import DenseSequential, StackedRecurrentFactory
+
+
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_convert_jit_compile(seed):
+
+    random_state = np.random.RandomState(seed)
+
+    input_dim = 3
+
+    model = DenseSequential(input_dim=input_dim, output_dim=1, num_layers=2,
+                            num_units=32, layer_kws=dict(activation="elu"))
+
+    fn = convert(model, transform=tf.sigmoid, jit_compile=False)
+    fn_jit = convert(model, transform=tf.sigmoid, jit_compile=True)
+
+    for _ in range(5):
+
+        x = random_state.rand(input_dim)
+
+        val, grad = fn(x)
+        val_jit, grad_jit = fn_jit(x)
+
+        assert np.shape(val_jit) == ()
+        assert grad_jit.shape == (input_dim,)
+
+        np.testing.assert_allclose(val_jit, val, rtol=1e-5)
+        np.testing.assert_allclose(grad_jit, grad, rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize("negate", [True, False])
+@pytest.mark.parametrize("transform", [tf.identity, tf.sigmoid, tf.exp])
+@pytest.mark.parametrize("seed", [0, 42])
+def test_convert_transform(transform, negate, seed):
+
+    random_state = np.random.RandomState(seed)
+
+    input_dim = 3
+    batch_size = 8
+
+    model = DenseSequential(input_dim=input_dim, output_dim=1, num_layers=2,
+                            num_units=32, layer_kws=dict(activation="elu"))
+
+    sign = -1. if negate else 1.
+
+    # derivative of transform applied in closed form
+    fn = convert_batch(model, transform=transform, negate=negate)
+    # derivative of transform obtained by automatic differentiation
+    fn_auto = convert_batch(model, transform=lambda u: transform(sign * u))
+
+    X = random_state.rand(batch_size, input_dim)
+
+    val, grad = fn(X)
+    val_auto, grad_auto = fn_auto(X)
+
+    assert val.shape == (batch_size,)
+    assert grad.shape == (batch_size, input_dim)
+
+    np.testing.assert_allclose(val, val_auto, rtol=1e-5)
+    np.testing.assert_allclose(grad, grad_auto, rtol=1e-4, atol=1e-6)
+
+    fn = convert(model, transform=transform, negate=negate)
+
+    val, grad = fn(X[0])
+
+    assert np.shape(val) == ()
+    assert grad.shape == (input_dim,)
+
+    np.testing.assert_allclose(val, val_auto[0], rtol=1e-5)
+    np.testing.assert_allclose(grad, grad_auto[0], rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize("jit_compile", [True, False])
+@pytest.mark.parametrize("transform", [tf.identity, tf.sigmoid, tf.exp])
+@pytest.mark.parametrize("activation", ["elu", "relu", "tanh", "sigmoid"])
+@pytest.mark.parametrize("seed", [0, 42])
+def test_convert_dense(activation, transform, seed, jit_compile):
+
+    random_state = np.random.RandomState(seed)
+
+    input_dim = 3
+    batch_size = 8
+
+    model = DenseSequential(input_dim=input_dim, output_dim=1, num_layers=2,
+                            num_units=32,
+                            layer_kws=dict(activation=activation))
+
+    assert is_dense(model, transform=transform)
+
+    fn = convert_batch(model, transform=transform, negate=True,
+                       jit_compile=False)
+    fn_dense = convert_dense(model, transform=transform, negate=True,
+                             jit_compile=jit_compile)
+
+    X = random_state.rand(batch_size, input_dim)
+
+    val, grad = fn(X)
+    val_dense, grad_dense = fn_dense(X)
+
+    assert val_dense.shape == (batch_size,)
+    assert grad_dense.shape == (batch_size, input_dim)
+
+    np.testing.assert_allclose(val_dense, val, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(grad_dense, grad, rtol=1e-4, atol=1e-6)
+
+    # single input
+    val_dense, grad_dense = fn_dense(X[0])
+
+    assert np.shape(val_dense) == ()
+    assert grad_dense.shape == (input_dim,)
+
+    np.testing.assert_allclose(val_dense, val[0], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(grad_dense, grad[0], rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize("jit_compile", [True, False])
+@pytest.mark.parametrize("transform", [tf.identity, tf.sigmoid, tf.exp])
+@pytest.mark.parametrize("activation", ["elu", "tanh"])
+@pytest.mark.parametrize("num_layers", [1, 2])
+def test_convert_recurrent(num_layers, activation, transform, jit_compile):
+
+    random_state = np.random.RandomState(42)
+
+    input_dim = 3
+    batch_size = 8
+    num_steps = 4
+
+    factory = StackedRecurrentFactory(input_dim=input_dim, output_dim=1,
+                                      num_layers=num_layers, num_units=16,
+                                      layer_kws=dict(activation=activation))
+    model = factory.build_one_to_one(num_steps=num_steps, transform=transform)
+
+    assert is_recurrent(model, transform=transform)
+    assert not is_recurrent(factory.build_many_to_many(), transform=transform)
+    assert not is_dense(model, transform=transform)
+
+    fn = convert_batch(model, transform=transform, negate=True,
+                       jit_compile=False)
+    fn_recurrent = convert_recurrent(model, transform=transform, negate=True,
+                                     jit_compile=jit_compile)
+
+    X = random_state.rand(batch_size, input_dim)
+
+    val, grad = fn(X)
+    val_recurrent, grad_recurrent = fn_recurrent(X)
+
+    assert val_recurrent.shape == (batch_size,)
+    assert grad_recurrent.shape == (batch_size, input_dim)
+
+    np.testing.assert_allclose(val_recurrent, val, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(grad_recurrent, grad, rtol=1e-4, atol=1e-6)
+
+    # single input
+    val_recurrent, grad_recurrent = fn_recurrent(X[0])
+
+    assert np.shape(val_recurrent) == ()
+    assert grad_recurrent.shape == (input_dim,)
+
+    np.testing.assert_allclose(val_recurrent, val[0], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(grad_recurrent, grad[0], rtol=1e-4, atol=1e-6)
+
+    # structure is only inspected once, but the weights on every conversion
+    model.set_weights([2. * w for w in model.get_weights()])
+
+    def get_config(self):
+        raise AssertionError("configuration should not be inspected again")
+
+    with pytest.MonkeyPatch.context() as mp:
+        for layer in model.layers:
+            mp.setattr(type(layer), "get_config", get_config)
+            if hasattr(layer, "cell"):
+                mp.setattr(type(layer.cell), "get_config", get_config)
+        assert is_recurrent(model, transform=transform)
+        fn_recurrent = convert_recurrent(model, transform=transform,
+                                         negate=True, jit_compile=jit_compile)
+
+    val, grad = fn(X)
+    val_recurrent, grad_recurrent = fn_recurrent(X)
+
+    np.testing.assert_allclose(val_recurrent, val, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(grad_recurrent, grad, rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize("loc", [-3., 0., 0.25, 1., 4.])
+@pytest.mark.parametrize("scale", [0.1, 1.])
+@pytest.mark.parametrize("seed", [0, 42])
+def test_sample_truncated_normal(loc, scale, seed):
+
+    random_state = np.random.RandomState(seed)
+
+    num_samples = 1000
+    lower, upper = 0., 1.
+
+    samples = np.hstack([sample_truncated_normal(loc=loc, scale=scale,
+                                                 lower=lower, upper=upper,
+                                                 random_state=random_state)
+                         for _ in range(num_samples)])
+
+    assert samples.shape == (num_samples,)
+    assert np.all((lower <= samples) & (samples <= upper))
+
+    dist = truncated_normal(loc=loc, scale=scale, lower=lower, upper=upper)
+    assert kstest(samples, dist.cdf).pvalue > 1e-3
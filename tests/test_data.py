@@ -5,7 +5,7 @@
 import numpy as np
 import pytest
 
-from bore.data import MultiFidelityRecord
+from bore.data import Record, MultiFidelityRecord
 
 
 def test_record():
@@ -122,3 +122,143 @@ def test_record():
     inputs, targets = record.sequences(pad_value=pad_value, binary=False)
 
     assert record.load_feature_matrix().shape == (3, input_dim)
+
+
+@pytest.mark.parametrize("binary", [True, False])
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_multi_fidelity_record_sequences(binary, seed):
+
+    input_dim = 2
+    num_inputs = 40
+    num_samples = 100
+
+    pad_value = -1.
+
+    random_state = np.random.RandomState(seed=seed)
+
+    X = random_state.rand(num_inputs, input_dim)
+    # budgets not necessarily encountered in increasing order
+    budgets = [3, 1, 9, 27]
+
+    record = MultiFidelityRecord(gamma=1/3)
+
+    for n in range(num_samples):
+
+        x = X[random_state.randint(num_inputs)]
+        b = budgets[min(random_state.geometric(p=.5) - 1, len(budgets) - 1)]
+        record.append(x=x, y=random_state.randn(), b=b)
+
+        inputs, targets = record.sequences(pad_value=pad_value, binary=binary)
+
+        # compare against sequences assembled from dictionary
+        sequences, indices = record.sequences_dict(pad_value=pad_value,
+                                                   binary=binary,
+                                                   return_indices=True)
+
+        num_features = record.num_features()
+        num_rungs = record.num_rungs()
+
+        assert inputs.shape == (num_features, num_rungs, input_dim)
+        assert targets.shape == (num_features, num_rungs, 1)
+
+        inputs32, targets32 = record.sequences(pad_value=pad_value,
+                                               binary=binary, dtype="float32")
+
+        assert inputs32.dtype == targets32.dtype == np.float32
+        np.testing.assert_array_equal(inputs32, inputs.astype("float32"))
+        np.testing.assert_array_equal(targets32, targets.astype("float32"))
+
+        for i, (k, ys) in enumerate(sequences.items()):
+            observed = np.array(indices[k])
+            np.testing.assert_array_equal(targets[i, :, 0], ys)
+            np.testing.assert_array_equal(inputs[i, observed],
+                                          np.tile(k, reps=(observed.sum(), 1)))
+            np.testing.assert_array_equal(inputs[i, ~observed], pad_value)
+
+
+@pytest.mark.parametrize("gamma", [0.1, 0.25, 1/3, 0.5])
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_record_classification_data(gamma, seed):
+
+    input_dim = 2
+    num_samples = 50
+
+    random_state = np.random.RandomState(seed=seed)
+
+    record = Record()
+
+    for n in range(1, num_samples + 1):
+
+        x = random_state.rand(input_dim)
+        # include some ties
+        y = random_state.randint(20) if n % 2 else random_state.randn()
+        record.append(x, y)
+
+        X, z = record.load_classification_data(gamma)
+
+        y_all = np.hstack(record.targets)
+        tau = np.quantile(y_all, q=gamma)
+
+        assert X.shape == (n, input_dim)
+        np.testing.assert_allclose(record.threshold(gamma), tau)
+        np.testing.assert_array_equal(z, np.less(y_all, tau))
+
+
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_record_is_duplicate(seed):
+
+    input_dim = 3
+    num_samples = 40  # enough to exceed the initial buffer capacity
+
+    random_state = np.random.RandomState(seed=seed)
+
+    record = Record()
+
+    assert not record.is_duplicate(random_state.rand(input_dim))
+
+    X_prev = None
+    for n in range(num_samples):
+        record.append(random_state.rand(input_dim), random_state.randn())
+        if n == 7:
+            X_prev = record.load_feature_matrix()
+
+    np.testing.assert_array_equal(record.load_feature_matrix(),
+                                  np.vstack(record.features))
+
+    # views remain unchanged as the buffer grows, and cannot be modified
+    np.testing.assert_array_equal(X_prev, np.vstack(record.features[:8]))
+    with pytest.raises(ValueError):
+        X_prev[0] = 0.
+
+    for x_prev in record.features:
+        assert record.is_duplicate(x_prev)
+        assert record.is_duplicate(x_prev + 1e-9)
+        assert not record.is_duplicate(x_prev + 1e-3)
+
+    assert not record.is_duplicate(random_state.rand(input_dim))
+
+
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_multi_fidelity_record_is_duplicate(seed):
+
+    input_dim = 3
+    num_samples = 40  # enough to exceed the initial buffer capacity
+    budgets = [1., 3., 9.]
+
+    random_state = np.random.RandomState(seed=seed)
+
+    record = MultiFidelityRecord(gamma=.25)
+
+    assert not record.is_duplicate(random_state.rand(input_dim))
+
+    features = random_state.rand(num_samples, input_dim)
+    for x in features:
+        for b in budgets[:random_state.randint(1, len(budgets) + 1)]:
+            record.append(x, random_state.randn(), b)
+
+    for x_prev in features:
+        assert record.is_duplicate(x_prev)
+        assert record.is_duplicate(x_prev + 1e-9)
+        assert not record.is_duplicate(x_prev + 1e-3)
+
+    assert not record.is_duplicate(random_state.rand(input_dim))
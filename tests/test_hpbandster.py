@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+"""Tests for `bore` package."""
+
+import warnings
+import pytest
+import numpy as np
+import ConfigSpace as CS
+
+import hpbandster.core.nameserver as hpns
+
+from hpbandster.core.worker import Worker
+from scipy.optimize import OptimizeResult
+from bore.plugins.hpbandster.base import BORE, ClassifierConfigGenerator
+from bore.plugins.hpbandster.multi_fidelity import (
+    BOREHyperband, SequenceClassifierConfigGenerator)
+
+
+class QuadraticWorker(Worker):
+
+    def compute(self, config, budget, **kwargs):
+        return dict(loss=config["x"]**2 / budget, info=None)
+
+
+@pytest.mark.parametrize("retrain", [False, True])
+def test_bore(retrain):
+
+    run_id = "test_bore"
+    num_iterations = 6
+
+    config_space = CS.ConfigurationSpace(seed=1)
+    config_space.add_hyperparameter(
+        CS.UniformFloatHyperparameter("x", lower=-2., upper=2.))
+
+    ns = hpns.NameServer(run_id=run_id, host="127.0.0.1", port=None)
+    host, port = ns.start()
+
+    worker = QuadraticWorker(run_id=run_id, host=host, nameserver=host,
+                             nameserver_port=port)
+    worker.run(background=True)
+
+    # with a single budget, each iteration suggests a single configuration,
+    # and all those after the initial designs are (re)fitted to the data
+    optimizer = BORE(config_space, min_budget=1, max_budget=1,
+                     retrain=retrain, num_random_init=2, random_rate=None,
+                     num_starts=2, num_samples=16, num_steps_per_iter=5,
+                     seed=0, run_id=run_id, host=host, nameserver=host,
+                     nameserver_port=port)
+    try:
+        results = optimizer.run(n_iterations=num_iterations)
+    finally:
+        optimizer.shutdown(shutdown_workers=True)
+        ns.shutdown()
+
+    runs = results.get_all_runs()
+    assert len(runs) == num_iterations
+    for run in runs:
+        assert run.loss is not None
+
+
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_reuse_maximum(seed):
+
+    random_state = np.random.RandomState(seed)
+
+    config_space = CS.ConfigurationSpace(seed=seed)
+    config_space.add_hyperparameter(
+        CS.UniformFloatHyperparameter("x", lower=-2., upper=2.))
+
+    cg = ClassifierConfigGenerator(config_space=config_space, gamma=1/3,
+                                   num_random_init=2, random_rate=None,
+                                   retrain=False, classifier_kws={},
+                                   fit_kws={},
+                                   optimizer_kws=dict(num_starts=2,
+                                                      reuse_maximum=True),
+                                   seed=seed)
+
+    for x in random_state.uniform(size=(8, 1)):
+        cg.record.append(x=x, y=float(np.square(x - .5)), b=1.)
+    cg._maybe_create_classifier()
+
+    # maximum found previously, with a value under some other classifier
+    x_max = cg.logit.argmax(cg.bounds, num_starts=2, print_fn=lambda x: None,
+                            random_state=random_state).x
+    cg._last_opt = OptimizeResult(x=x_max, fun=np.inf)
+    cg._last_opt_size = cg.record.size() - 1
+
+    opt = cg._maybe_reuse_maximum(cg.record.size())
+
+    assert opt is not None
+    np.testing.assert_array_equal(opt.x, x_max)
+
+    # value under the current classifier, of the function minimized by
+    # `argmax`
+    fun, _ = cg.logit._func_min(x_max)
+    np.testing.assert_allclose(opt.fun, fun, rtol=1e-6)
+
+
+@pytest.mark.parametrize("num_samples,num_samples_expected", [(1, 1),
+                                                             (100, 128),
+                                                             (256, 256)])
+def test_sample_candidates(num_samples, num_samples_expected):
+
+    config_space = CS.ConfigurationSpace(seed=1)
+    config_space.add_hyperparameter(
+        CS.UniformFloatHyperparameter("x", lower=-2., upper=2.))
+    config_space.add_hyperparameter(
+        CS.CategoricalHyperparameter("c", ["a", "b", "c"]))
+
+    cg = SequenceClassifierConfigGenerator(
+        config_space=config_space, gamma=1/3, num_random_init=2,
+        random_rate=None, retrain=False, classifier_kws={}, fit_kws={},
+        optimizer_kws=dict(num_starts=1, num_samples=num_samples), seed=0)
+
+    # rounded up to a power of two, so that the Sobol' points are balanced
+    assert cg.num_samples == num_samples_expected
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        for i in range(3):
+            candidates = cg._sample_candidates()
+            assert candidates.shape == (num_samples_expected, cg.input_dim)
+
+
+@pytest.mark.parametrize("dtype_policy", [None, "mixed_float16"])
+def test_bore_hyperband(dtype_policy):
+
+    run_id = "test_bore_hyperband"
+    num_iterations = 4
+
+    config_space = CS.ConfigurationSpace(seed=1)
+    config_space.add_hyperparameter(
+        CS.UniformFloatHyperparameter("x", lower=-2., upper=2.))
+
+    ns = hpns.NameServer(run_id=run_id, host="127.0.0.1", port=None)
+    host, port = ns.start()
+
+    worker = QuadraticWorker(run_id=run_id, host=host, nameserver=host,
+                             nameserver_port=port)
+    worker.run(background=True)
+
+    # two rungs, so the classifier is fitted to sequences of either length
+    optimizer = BOREHyperband(config_space, eta=3, min_budget=1/3,
+                              max_budget=1, num_random_init=2,
+                              random_rate=None, num_starts=2, num_samples=16,
+                              num_steps_per_iter=5, dtype_policy=dtype_policy,
+                              seed=0, run_id=run_id,
+                              host=host, nameserver=host,
+                              nameserver_port=port)
+    try:
+        results = optimizer.run(n_iterations=num_iterations)
+    finally:
+        optimizer.shutdown(shutdown_workers=True)
+        ns.shutdown()
+
+    runs = results.get_all_runs()
+    assert len({run.budget for run in runs}) == 2
+    for run in runs:
+        assert run.loss is not None
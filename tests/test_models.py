@@ -6,11 +6,18 @@ import numpy as np
 import pytest
 
 from scipy.optimize import Bounds
-from bore.models import StackedRecurrentFactory, MaximizableDenseSequential
+from bore.models import (StackedRecurrentFactory, MaximizableDenseSequential,
+                         reset_weights)
 
 
+@pytest.mark.parametrize("batch,lockstep,warm_start", [(True, False, False),
+                                                       (False, True, False),
+                                                       (False, False, False),
+                                                       (False, False, True)])
+@pytest.mark.parametrize("init_strategy", ["best", "boltzmann"])
 @pytest.mark.parametrize("seed", [0, 42, 8888])
-def test_maximizable_dense_sequential(seed):
+def test_maximizable_dense_sequential(seed, init_strategy, batch, lockstep,
+                                      warm_start):
 
     random_state = np.random.RandomState(seed)
 
@@ -40,6 +47,10 @@ def test_maximizable_dense_sequential(seed):
                        num_samples=n_samples,
                        method="L-BFGS-B",
                        options=dict(maxiter=1000, ftol=1e-9),
+                       init_strategy=init_strategy,
+                       batch=batch,
+                       lockstep=lockstep,
+                       warm_start=warm_start,
                        print_fn=lambda x: None,
                        random_state=random_state)
 
@@ -50,6 +61,101 @@ def test_maximizable_dense_sequential(seed):
     assert np.greater_equal(model.predict(X_opt), y_test).all()
 
 
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_maximizable_argmax_filter(seed):
+
+    input_dim = 2
+
+    n_starts = 5
+    n_samples = 1024
+    bounds = Bounds(lb=np.zeros(input_dim), ub=np.ones(input_dim))
+
+    model = MaximizableDenseSequential(input_dim=input_dim, output_dim=1,
+                                       num_layers=2, num_units=32)
+
+    kws = dict(bounds=bounds, num_starts=n_starts, num_samples=n_samples,
+               print_fn=lambda x: None)
+
+    results = model.maxima(random_state=np.random.RandomState(seed), **kws)
+    res_best = min(results, key=lambda res: res.fun)
+
+    # filter should only be applied until a result has been accepted
+    visited = []
+
+    def accept(res):
+        visited.append(res)
+        return True
+
+    opt = model.argmax(filter_fn=accept,
+                       random_state=np.random.RandomState(seed), **kws)
+
+    assert len(visited) == 1
+    np.testing.assert_array_equal(opt.x, res_best.x)
+
+    # results are visited in order of value
+    visited = []
+
+    def reject(res):
+        visited.append(res.fun)
+        return False
+
+    opt = model.argmax(filter_fn=reject,
+                       random_state=np.random.RandomState(seed), **kws)
+
+    assert opt is None
+    assert len(visited) == n_starts
+    assert visited == sorted(visited)
+
+
+@pytest.mark.parametrize("batch,lockstep,warm_start", [(True, True, False),
+                                                       (True, False, True),
+                                                       (False, True, True)])
+def test_maximizable_exclusive_strategies(batch, lockstep, warm_start):
+
+    input_dim = 2
+    bounds = Bounds(lb=np.zeros(input_dim), ub=np.ones(input_dim))
+
+    model = MaximizableDenseSequential(input_dim=input_dim, output_dim=1,
+                                       num_layers=2, num_units=32)
+
+    with pytest.raises(AssertionError):
+        model.maxima(bounds=bounds, batch=batch, lockstep=lockstep,
+                     warm_start=warm_start, print_fn=lambda x: None)
+
+
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_maximizable_candidates(seed):
+
+    random_state = np.random.RandomState(seed)
+
+    input_dim = 2
+
+    n_samples = 64
+    bounds = Bounds(lb=np.zeros(input_dim), ub=np.ones(input_dim))
+
+    model = MaximizableDenseSequential(input_dim=input_dim, output_dim=1,
+                                       num_layers=2, num_units=32)
+
+    X = random_state.uniform(low=bounds.lb, high=bounds.ub,
+                             size=(n_samples, input_dim))
+    y = model.predict(X).squeeze(axis=-1)
+
+    # without any starts, the best of the given candidates is returned
+    results = model.maxima(bounds=bounds, num_starts=0, candidates=X,
+                           print_fn=lambda x: None, random_state=random_state)
+
+    assert len(results) == 1
+    np.testing.assert_array_equal(results[0].x, X[np.argmax(y)])
+
+    # the number of candidates takes precedence over `num_samples`
+    results = model.maxima(bounds=bounds, num_starts=5, num_samples=1024,
+                           candidates=X, print_fn=lambda x: None,
+                           random_state=random_state)
+
+    assert len(results) == 5
+    assert -min(res.fun for res in results) >= y.max() - 1e-6
+
+
 @pytest.mark.parametrize("seed", [0, 42, 8888])
 def test_stacked_recurrent_factory(seed):
 
@@ -109,3 +215,84 @@ def test_stacked_recurrent_factory(seed):
     X_opt = np.expand_dims(opt.x, axis=0)
 
     assert np.greater_equal(network2.predict(X_opt), y_test).all()
+
+    # candidates are screened without retracing for different batch sizes
+    network2.maxima(bounds=bounds, num_starts=n_starts, num_samples=n_starts,
+                    print_fn=lambda x: None, random_state=random_state)
+
+    assert network2._predict_fn.experimental_get_tracing_count() == 1
+
+
+@pytest.mark.parametrize("dtype_policy", ["mixed_float16", "mixed_bfloat16"])
+def test_stacked_recurrent_factory_dtype_policy(dtype_policy):
+
+    random_state = np.random.RandomState(42)
+
+    input_dim = 2
+    n_samples = 16
+    n_steps = 3
+
+    factory = StackedRecurrentFactory(
+        input_dim=input_dim,
+        output_dim=1,
+        layer_kws=dict(dtype=dtype_policy),
+        final_layer_kws=dict(dtype="float32"),
+    )
+
+    network1 = factory.build_many_to_many()
+    network2 = factory.build_one_to_one(num_steps=n_steps)
+
+    X_test = random_state.uniform(size=(n_samples, input_dim))
+    X_test_tiled = np.tile(np.expand_dims(X_test, axis=1), reps=(n_steps, 1))
+
+    # variables and outputs remain in full precision
+    assert all(w.dtype == "float32" for w in network1.trainable_variables)
+    assert network1(X_test_tiled).dtype == "float32"
+
+    values, grads = network2._func_min_batch(X_test)
+
+    assert values.shape == (n_samples,)
+    assert grads.shape == (n_samples, input_dim)
+    assert grads.dtype == "float64"
+
+
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_reset_weights(seed):
+
+    random_state = np.random.RandomState(seed)
+
+    input_dim = 2
+    n_samples = 16
+
+    model = MaximizableDenseSequential(input_dim=input_dim, output_dim=1,
+                                       num_layers=2, num_units=32)
+    model.compile(optimizer="adam", loss="mse")
+
+    X = random_state.rand(n_samples, input_dim)
+    y = random_state.randn(n_samples, 1)
+    model.fit(X, y, epochs=2, verbose=False)
+
+    learning_rate = float(model.optimizer.learning_rate)
+
+    weights_old = model.get_weights()
+    reset_weights(model)
+    weights_new = model.get_weights()
+
+    for w_old, w_new in zip(weights_old, weights_new):
+        assert w_old.shape == w_new.shape
+
+    # kernels are re-initialized at random, and biases to zero
+    for w_old, w_new in zip(weights_old[::2], weights_new[::2]):
+        assert not np.allclose(w_old, w_new)
+    for w_new in weights_new[1::2]:
+        np.testing.assert_array_equal(w_new, 0.)
+
+    variables = model.optimizer.variables
+    if callable(variables):
+        variables = variables()
+    for variable in variables:
+        if variable is model.optimizer.learning_rate:
+            continue
+        np.testing.assert_array_equal(variable.numpy(), 0)
+
+    assert float(model.optimizer.learning_rate) == learning_rate
@@ -5,10 +5,15 @@
 import pytest
 import numpy as np
 
+from scipy.optimize import minimize
 from scipy.stats import multivariate_normal
 from scipy.spatial.distance import pdist, squareform
 from sklearn.metrics.pairwise import rbf_kernel
 
+from bore.optimizers import (minimize_batch, minimize_lockstep,
+                             minimize_warm_start, minimize_jac)
+from bore.optimizers.base import _LOCKSTEP_THREAD_SAFE
+from bore.optimizers.utils import boltzmann_sample
 from bore.optimizers.svgd.base import SVGD
 from bore.optimizers.svgd.kernels import RadialBasis
 
@@ -187,3 +192,229 @@ def test_svgd(n_iter, batch_size, length_scale, seed):
     assert x2.shape == x_init.shape
 
     np.testing.assert_array_equal(x1, x2)
+
+
+@pytest.mark.parametrize("n_features", [1, 2, 5])
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_minimize_batch(n_features, seed):
+
+    batch_size = 8
+
+    random_state = np.random.RandomState(seed)
+
+    # each row of `X` has its own minimum, some of which lie outside bounds
+    mu = random_state.uniform(low=-.5, high=1.5,
+                              size=(batch_size, n_features))
+
+    num_calls = []
+
+    def func(X):
+        num_calls.append(len(X))
+        return np.sum(np.square(X - mu), axis=-1), 2. * (X - mu)
+
+    bounds = [(0., 1.)] * n_features
+    x_init = random_state.uniform(size=(batch_size, n_features))
+
+    results = minimize_batch(func, x0=x_init, bounds=bounds,
+                             method="L-BFGS-B",
+                             options=dict(maxiter=1000, ftol=1e-12))
+
+    assert len(results) == batch_size
+    # no further evaluations beyond those of the minimizer
+    assert len(num_calls) == results[0].nfev
+
+    for i, res in enumerate(results):
+        assert res.x.shape == (n_features,)
+        np.testing.assert_allclose(res.x, mu[i].clip(0., 1.), atol=1e-6)
+        np.testing.assert_allclose(res.fun,
+                                   np.sum(np.square(res.x - mu[i])))
+
+
+@pytest.mark.parametrize("n_features", [1, 2, 5])
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_minimize_lockstep(n_features, seed):
+
+    batch_size = 8
+
+    random_state = np.random.RandomState(seed)
+
+    # minimum possibly outside bounds
+    mu = random_state.uniform(low=-.5, high=1.5, size=n_features)
+    scale = np.logspace(0, 2, n_features)
+
+    batch_sizes = []
+
+    def func(X):
+        batch_sizes.append(len(X))
+        return np.sum(scale * np.square(X - mu), axis=-1), \
+            2. * scale * (X - mu)
+
+    bounds = [(0., 1.)] * n_features
+    x_init = random_state.uniform(size=(batch_size, n_features))
+
+    results = minimize_lockstep(func, x0=x_init, bounds=bounds,
+                                method="L-BFGS-B",
+                                options=dict(maxiter=1000, ftol=1e-12))
+
+    assert len(results) == batch_size
+
+    # starting points drop out of the batch as they converge
+    if _LOCKSTEP_THREAD_SAFE:
+        assert batch_sizes[0] == batch_size
+        assert batch_sizes == sorted(batch_sizes, reverse=True)
+    assert sum(batch_sizes) == sum(res.nfev for res in results)
+
+    def func_single(x):
+        values, grads = func(np.expand_dims(x, axis=0))
+        return values[0], grads[0]
+
+    for x, res in zip(x_init, results):
+        assert res.x.shape == (n_features,)
+        np.testing.assert_allclose(res.x, mu.clip(0., 1.), atol=1e-5)
+
+        # same as minimizing from each starting point separately
+        res_ref = minimize(func_single, x0=x, bounds=bounds,
+                           method="L-BFGS-B", jac=True,
+                           options=dict(maxiter=1000, ftol=1e-12))
+        assert res.nit == res_ref.nit
+
+
+@pytest.mark.parametrize("n_features", [1, 2, 5])
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_minimize_lockstep_sequential(n_features, seed):
+
+    batch_size = 8
+
+    random_state = np.random.RandomState(seed)
+
+    # multimodal, so that different starting points reach different minima
+    freq = random_state.uniform(low=5., high=10., size=n_features)
+
+    def func(X):
+        return np.sum(np.sin(freq * X) + np.square(X), axis=-1), \
+            freq * np.cos(freq * X) + 2. * X
+
+    def func_single(x):
+        values, grads = func(np.expand_dims(x, axis=0))
+        return values[0], grads[0]
+
+    bounds = [(-1., 1.)] * n_features
+    x_init = random_state.uniform(low=-1., high=1.,
+                                  size=(batch_size, n_features))
+
+    results = minimize_lockstep(func, x0=x_init, bounds=bounds,
+                                method="L-BFGS-B",
+                                options=dict(maxiter=1000, ftol=1e-9))
+
+    # same as minimizing from each starting point separately, in sequence
+    for x, res in zip(x_init, results):
+        res_ref = minimize(func_single, x0=x, bounds=bounds,
+                           method="L-BFGS-B", jac=True,
+                           options=dict(maxiter=1000, ftol=1e-9))
+        np.testing.assert_allclose(res.x, res_ref.x)
+        np.testing.assert_allclose(res.fun, res_ref.fun)
+        assert res.nit == res_ref.nit
+        assert res.nfev == res_ref.nfev
+        assert res.status == res_ref.status
+
+
+def test_minimize_lockstep_error():
+
+    def func(X):
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        minimize_lockstep(func, x0=np.zeros((4, 2)), bounds=[(0., 1.)] * 2,
+                          method="L-BFGS-B")
+
+
+@pytest.mark.parametrize("n_features", [1, 2, 5])
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_minimize_warm_start(n_features, seed):
+
+    num_starts = 8
+
+    random_state = np.random.RandomState(seed)
+
+    # ill-conditioned quadratic with minimum possibly outside bounds
+    mu = random_state.uniform(low=-.5, high=1.5, size=n_features)
+    scale = np.logspace(0, 2, n_features)
+
+    def func(x):
+        return np.sum(scale * np.square(x - mu)), 2. * scale * (x - mu)
+
+    bounds = [(0., 1.)] * n_features
+    x_init = random_state.uniform(size=(num_starts, n_features))
+
+    results = minimize_warm_start(func, x0=x_init, bounds=bounds,
+                                  method="L-BFGS-B",
+                                  options=dict(maxiter=1000, ftol=1e-12))
+
+    assert len(results) == num_starts
+
+    for res in results:
+        assert res.x.shape == (n_features,)
+        np.testing.assert_allclose(res.x, mu.clip(0., 1.), atol=1e-5)
+
+
+@pytest.mark.parametrize("method", ["L-BFGS-B", "TNC"])
+@pytest.mark.parametrize("n_features", [1, 2, 5])
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_minimize_jac(n_features, method, seed):
+
+    random_state = np.random.RandomState(seed)
+
+    mu = random_state.uniform(low=-.5, high=1.5, size=n_features)
+
+    def func(x):
+        return np.sum(np.square(x - mu)), 2. * (x - mu)
+
+    bounds = [(0., 1.)] * n_features
+    x_init = random_state.uniform(size=n_features)
+    options = dict(ftol=1e-12)
+
+    res = minimize_jac(func, x0=x_init, bounds=bounds, method=method,
+                       options=options)
+    res_ref = minimize(func, x0=x_init, bounds=bounds, method=method,
+                       jac=True, options=options)
+
+    np.testing.assert_array_equal(res.x, res_ref.x)
+    assert res.fun == res_ref.fun
+    assert res.success == res_ref.success
+    assert res.nit == res_ref.nit
+
+
+@pytest.mark.parametrize("n_starts", [1, 5, 20])
+@pytest.mark.parametrize("seed", [0, 42, 8888])
+def test_boltzmann_sample(n_starts, seed):
+
+    random_state = np.random.RandomState(seed)
+
+    n_samples = 1024
+
+    # nonnegative values, with most candidates far below the best
+    values = random_state.uniform(size=n_samples) ** 8
+    ind = boltzmann_sample(values, num_samples=n_starts,
+                           random_state=random_state)
+
+    assert ind.shape == (n_starts,)
+    assert len(np.unique(ind)) == n_starts
+    assert np.argmax(values) in ind
+    assert np.all(values[ind] >= 1e-4 * values.max())
+
+    # values of arbitrary sign
+    values = random_state.randn(n_samples)
+    ind = boltzmann_sample(values, num_samples=n_starts,
+                           random_state=random_state)
+
+    assert len(np.unique(ind)) == n_starts
+    assert np.argmax(values) in ind
+
+    # quality threshold is relaxed until there are enough eligible candidates
+    values = np.zeros(n_samples)
+    values[0] = 1.
+    ind = boltzmann_sample(values, num_samples=n_starts,
+                           random_state=random_state)
+
+    assert len(np.unique(ind)) == n_starts
+    assert 0 in ind
@@ -6,7 +6,9 @@ import numpy as np
 import pytest
 import ConfigSpace as CS
 
-from bore.plugins.hpbandster.types import DenseConfigurationSpace, DenseConfiguration
+from bore.plugins.hpbandster.types import (DenseConfigurationSpace,
+                                           DenseConfiguration,
+                                           array_from_dict, dict_from_array)
 
 
 @pytest.fixture
@@ -18,16 +20,20 @@ def seed():
 def config_space(seed):
 
     cs = CS.ConfigurationSpace(seed=seed)
-    cs.add_hyperparameter(CS.UniformIntegerHyperparameter("n_units_1", lower=0, upper=5))
-    cs.add_hyperparameter(CS.UniformIntegerHyperparameter("n_units_2", lower=0, upper=5))
+    cs.add_hyperparameter(CS.UniformIntegerHyperparameter(
+        "n_units_1", lower=0, upper=5, default_value=2))
+    cs.add_hyperparameter(CS.UniformIntegerHyperparameter(
+        "n_units_2", lower=0, upper=5, default_value=2))
     cs.add_hyperparameter(CS.UniformFloatHyperparameter("dropout_1", lower=0, upper=0.9))
     cs.add_hyperparameter(CS.UniformFloatHyperparameter("dropout_2", lower=0, upper=0.9))
     cs.add_hyperparameter(CS.CategoricalHyperparameter("activation_fn_1", ["tanh", "relu"]))
     cs.add_hyperparameter(CS.CategoricalHyperparameter("activation_fn_2", ["tanh", "relu"]))
     cs.add_hyperparameter(
-        CS.UniformIntegerHyperparameter("init_lr", lower=0, upper=5))
+        CS.UniformIntegerHyperparameter("init_lr", lower=0, upper=5,
+                                        default_value=2))
     cs.add_hyperparameter(CS.CategoricalHyperparameter("lr_schedule", ["cosine", "const"]))
-    cs.add_hyperparameter(CS.UniformIntegerHyperparameter("batch_size", lower=0, upper=3))
+    cs.add_hyperparameter(CS.UniformIntegerHyperparameter(
+        "batch_size", lower=0, upper=3, default_value=1))
 
     return cs
 
@@ -104,3 +110,25 @@ def test_dense_encoding(config_space, seed):
     dct_recon = config_recon.get_dictionary()
 
     assert dct_recon["activation_fn_1"] == "tanh"
+
+
+def test_array_dict_conversion(config_space, seed):
+
+    cs_dense = DenseConfigurationSpace(config_space, seed=seed)
+
+    for config in cs_dense.sample_configuration(size=10):
+
+        dct = config.get_dictionary()
+        array = array_from_dict(cs_dense, dct)
+
+        np.testing.assert_array_equal(array, config.to_array())
+        assert dict_from_array(cs_dense, array) == dct
+
+        # perturb array and compare against reference implementation
+        noise = np.random.RandomState(seed).rand(*array.shape)
+        array_perturbed = array + 0.1 * noise
+        array_perturbed = np.clip(array_perturbed, 0., 1.)
+
+        dct_perturbed = DenseConfiguration.from_array(
+            cs_dense, array_perturbed).get_dictionary()
+        assert dict_from_array(cs_dense, array_perturbed) == dct_perturbed